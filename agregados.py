@@ -0,0 +1,166 @@
+# Tabelas agregadas por sprint, calculadas uma vez e mantidas incrementalmente
+from collections import defaultdict
+
+ESTADOS_CONCLUIDOS = ('done', 'concluído', 'finalizado')
+TAG_NAO_PLANEJADA = '[nãoplanejada]'
+TAG_SUSTENTACAO = '[sustentação]'
+TAGS = (TAG_NAO_PLANEJADA, TAG_SUSTENTACAO)
+
+
+def _linha_dev():
+    return {"total_itens": 0, "nao_planejadas": 0, "concluidos": 0, "done": 0, "horas_trabalhadas": 0.0}
+
+
+def _linha_tipo():
+    return {"itens": 0, "horas": 0.0}
+
+
+class SprintAggregates:
+    """Agregados da sprint por dev e por (tipo, estado, tag)
+
+    As views leem daqui em vez de varrer os itens; o custo de leitura cresce com o
+    número de devs/combinações, não com o número de itens. Mudanças em itens
+    individuais são aplicadas com remover/adicionar sem recalcular o resto.
+    """
+
+    def __init__(self):
+        self.totais = {"itens": 0, "done": 0, "horas": 0.0}
+        self.por_dev = {}
+        self._itens_por_dev = {}
+        # Itens ainda não agrupados por dev (agregados restaurados de um snapshot)
+        self._pendentes = None
+        # Chave (tipo, estado em minúsculas, tag); a tag None é a linha com todos os itens
+        self.por_tipo = defaultdict(_linha_tipo)
+
+    @classmethod
+    def from_work_items(cls, work_items):
+        agregados = cls()
+        for wi in work_items:
+            agregados.adicionar(wi)
+        return agregados
+
+    def para_metadados(self):
+        """Tabelas agregadas em formato JSON (sem os itens), gravadas junto do snapshot da sprint"""
+        return {
+            "totais": self.totais,
+            "por_dev": self.por_dev,
+            "por_tipo": [[*chave, linha] for chave, linha in self.por_tipo.items()]
+        }
+
+    @classmethod
+    def de_metadados(cls, dados, work_items):
+        """Restaura as tabelas sem varrer os itens; o agrupamento por dev só é montado no primeiro uso"""
+        agregados = cls()
+        agregados.totais = dados["totais"]
+        agregados.por_dev = dados["por_dev"]
+        agregados.por_tipo.update(((tipo, estado, tag), linha) for tipo, estado, tag, linha in dados["por_tipo"])
+        agregados._pendentes = work_items
+        return agregados
+
+    @property
+    def itens_por_dev(self):
+        if self._pendentes is not None:
+            # Leitores concorrentes montam dicts iguais; qualquer um deles serve
+            agrupados = {}
+            for wi in self._pendentes:
+                if wi.tipo != 'User Story':
+                    agrupados.setdefault(wi.dev, []).append(wi)
+            self._itens_por_dev, self._pendentes = agrupados, None
+        return self._itens_por_dev
+
+    def copiar(self):
+        """Cópia independente das tabelas (os work items em si são compartilhados)"""
+        copia = SprintAggregates()
+        copia.totais = dict(self.totais)
+        copia.por_dev = {dev: dict(linha) for dev, linha in self.por_dev.items()}
+        copia._itens_por_dev = {dev: list(itens) for dev, itens in self.itens_por_dev.items()}
+        copia.por_tipo.update((chave, dict(linha)) for chave, linha in self.por_tipo.items())
+        return copia
+
+    def adicionar(self, wi):
+        self._aplicar(wi, 1)
+
+    def remover(self, wi):
+        self._aplicar(wi, -1)
+
+    def atualizar(self, antigo, novo):
+        if antigo is not None:
+            self.remover(antigo)
+        if novo is not None:
+            self.adicionar(novo)
+
+    def _aplicar(self, wi, sinal):
+        titulo = wi.title.lower()
+        tags = [tag for tag in TAGS if tag in titulo]
+        estado = wi.state.lower()
+        horas = wi.completed_work or 0
+
+        self.totais["itens"] += sinal
+        self.totais["done"] += sinal * (estado == 'done')
+        self.totais["horas"] += sinal * horas
+
+        for tag in tags + [None]:
+            chave = (wi.tipo, estado, tag)
+            linha = self.por_tipo[chave]
+            linha["itens"] += sinal
+            linha["horas"] += sinal * horas
+            if not linha["itens"]:
+                del self.por_tipo[chave]
+
+        # User Stories não entram no detalhamento por dev (mesma regra de agrupar_por_dev)
+        if wi.tipo == 'User Story':
+            return
+        linha = self.por_dev.setdefault(wi.dev, _linha_dev())
+        itens = self.itens_por_dev.setdefault(wi.dev, [])
+        linha["total_itens"] += sinal
+        linha["nao_planejadas"] += sinal * (TAG_NAO_PLANEJADA in tags)
+        linha["concluidos"] += sinal * (estado in ESTADOS_CONCLUIDOS)
+        linha["done"] += sinal * (estado == 'done')
+        linha["horas_trabalhadas"] += sinal * horas
+        if sinal > 0:
+            itens.append(wi)
+        else:
+            itens[:] = [item for item in itens if item.id != wi.id]
+        if not linha["total_itens"]:
+            del self.por_dev[wi.dev]
+            del self.itens_por_dev[wi.dev]
+
+    def contar(self, tipo=None, estados=None, tag=None, campo="itens"):
+        """Soma `campo` das linhas (tipo, estado, tag) que batem com os filtros"""
+        return sum(
+            linha[campo] for (t, e, g), linha in self.por_tipo.items()
+            if g == tag and (tipo is None or t == tipo) and (estados is None or e in estados)
+        )
+
+    def resumo_dev(self, dev, horas_planejadas):
+        """Indicadores do card de cada dev, lidos direto da linha agregada"""
+        linha = self.por_dev[dev]
+        itens_planejados = linha["total_itens"] - linha["nao_planejadas"]
+        return {
+            "horas_planejadas": horas_planejadas,
+            "itens_planejados": itens_planejados,
+            "nao_planejadas": linha["nao_planejadas"],
+            "itens_concluidos": linha["concluidos"],
+            "horas_trabalhadas": linha["horas_trabalhadas"],
+            "diferenca_horas": linha["horas_trabalhadas"] - horas_planejadas,
+            "performance": (linha["concluidos"] / itens_planejados * 100) if itens_planejados else 0
+        }
+
+    def performance_tasks(self):
+        """Números do card de performance (tasks planejadas x não planejadas)"""
+        total_tasks = self.contar(tipo='Task')
+        total_nao_planejadas = self.contar(tipo='Task', tag=TAG_NAO_PLANEJADA)
+        total_done = self.contar(tipo='Task', estados=ESTADOS_CONCLUIDOS)
+        total_nao_planejadas_done = self.contar(tipo='Task', estados=ESTADOS_CONCLUIDOS, tag=TAG_NAO_PLANEJADA)
+        total_planejadas = total_tasks - total_nao_planejadas
+        total_planejadas_done = total_done - total_nao_planejadas_done
+        return {
+            "total_planejadas": total_planejadas,
+            "total_planejadas_done": total_planejadas_done,
+            "total_nao_planejadas": total_nao_planejadas,
+            "total_nao_planejadas_done": total_nao_planejadas_done,
+            "total_done": total_done,
+            "perf_planejadas": (total_planejadas_done / total_planejadas * 100) if total_planejadas else 0,
+            "perf_nao_planejadas": (total_nao_planejadas_done / total_nao_planejadas * 100) if total_nao_planejadas else 0,
+            "perf_geral": (total_done / total_tasks * 100) if total_tasks else 0
+        }
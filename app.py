@@ -1,198 +1,30 @@
-import requests
-from collections import defaultdict
 import streamlit as st
-import base64
 import matplotlib.pyplot as plt
 import pandas as pd
 from datetime import datetime
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from azure_devops import AZURE_CONFIG
+from capacidade import dias_uteis
+from dados_sprint import (
+    carregar_exportacoes, carregar_historico, carregar_iteracoes, carregar_sprint, carregar_tabelas,
+    create_sprint_selector, derivar_user_stories
+)
+from perfilamento import Profiler, perfil_solicitado
+from previsao import CONFIANCAS, contar_abertos, contar_concluidos, prever, somar_concluidos
+from tabelas import tabela_paginada
 
-# Constants
-FERIADOS = [
-    '01-01', '07-09', '25-12', '01-05',  # Nacionais
-    '25-01', '09-07',                    # SP
-    '19-03', '15-08'                     # Ribeirão Preto
-]
 
-AZURE_CONFIG = {
-    "ORGANIZATION": "iaratech",
-    "PROJECT": "Iara",
-    "PAT": os.getenv("AZURE_PAT"),
-    "WORKING_HOURS_PER_DAY": 7,
-    "DEFAULT_DEV_COUNT": 5
-}
-
-
-
-# Azure DevOps API Utilities
-class AzureDevOpsAPI:
-    def __init__(self):
-        self.headers = self._create_headers()
-        
-    def _create_headers(self):
-        encoded_pat = base64.b64encode(f":{AZURE_CONFIG['PAT']}".encode()).decode()
-        return {
-            "Content-Type": "application/json",
-            "Authorization": f"Basic {encoded_pat}"
-        }
-    def get_all_iterations(self):
-        url = f"https://dev.azure.com/{AZURE_CONFIG['ORGANIZATION']}/{AZURE_CONFIG['PROJECT']}/_apis/work/teamsettings/iterations?api-version=6.0"
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        return response.json().get("value", [])
-
-    def get_current_iteration(self):
-        url = f"https://dev.azure.com/{AZURE_CONFIG['ORGANIZATION']}/{AZURE_CONFIG['PROJECT']}/_apis/work/teamsettings/iterations?$timeframe=current&api-version=6.0"
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        data = response.json()
-
-        if not data['value']:
-            raise Exception("Nenhuma sprint atual encontrada.")
-
-        sprint = data['value'][0]
-        start = datetime.strptime(sprint['attributes']['startDate'], '%Y-%m-%dT%H:%M:%SZ')
-        end = datetime.strptime(sprint['attributes']['finishDate'], '%Y-%m-%dT%H:%M:%SZ')
-        return sprint['path'], start, end
-
-    def get_work_item_ids(self, iteration_path):
-        wiql = {
-            "query": f"""
-                SELECT [System.Id], [Microsoft.VSTS.Scheduling.OriginalEstimate], [Microsoft.VSTS.Scheduling.CompletedWork]
-                FROM WorkItems
-                WHERE [System.TeamProject] = '{AZURE_CONFIG['PROJECT']}'
-                  AND [System.IterationPath] = '{iteration_path}'
-                  AND [System.WorkItemType] IN ('User Story', 'Task', 'Bug')
-            """
-        }
-        response = requests.post(
-            f"https://dev.azure.com/{AZURE_CONFIG['ORGANIZATION']}/{AZURE_CONFIG['PROJECT']}/_apis/wit/wiql?api-version=6.0",
-            headers=self.headers, json=wiql)
-        response.raise_for_status()
-        data = response.json()
-        return [(item['id'],
-                 item.get('fields', {}).get('Microsoft.VSTS.Scheduling.OriginalEstimate', 0),
-                 item.get('fields', {}).get('Microsoft.VSTS.Scheduling.CompletedWork', 0))
-                for item in data.get('workItems', [])]
-
-    def get_work_items_details(self, ids_with_estimates):
-        if not ids_with_estimates:
-            return []
-
-        ids = [item[0] for item in ids_with_estimates]
-        url = f"https://dev.azure.com/{AZURE_CONFIG['ORGANIZATION']}/{AZURE_CONFIG['PROJECT']}/_apis/wit/workitemsbatch?api-version=6.0"
-        body = {
-            "ids": ids,
-            "fields": [
-                "System.Id", "System.Title", "System.AssignedTo",
-                "Microsoft.VSTS.Scheduling.CompletedWork", "Microsoft.VSTS.Scheduling.OriginalEstimate",
-                "System.WorkItemType", "System.State"
-            ]
-        }
-        response = requests.post(url, headers=self.headers, json=body)
-        response.raise_for_status()
-
-        items = response.json().get('value', [])
-        estimate_map = {item[0]: item[1] for item in ids_with_estimates}
-
-        for item in items:
-            item_id = item['id']
-            if 'fields' not in item:
-                item['fields'] = {}
-            item['fields']['Microsoft.VSTS.Scheduling.OriginalEstimate'] = estimate_map.get(item_id, 0)
-
-        return items
-    
-    
-    
-    def get_user_stories_with_task_hours(self, iteration_path):
-        wiql = {
-            "query": f"""
-                SELECT [System.Id], [System.Title], [System.State], [System.AssignedTo]
-                FROM WorkItems
-                WHERE [System.TeamProject] = '{AZURE_CONFIG['PROJECT']}'
-                  AND [System.IterationPath] = '{iteration_path}'
-                  AND [System.WorkItemType] = 'User Story'
-            """
-        }
-        response = requests.post(
-            f"https://dev.azure.com/{AZURE_CONFIG['ORGANIZATION']}/{AZURE_CONFIG['PROJECT']}/_apis/wit/wiql?api-version=6.0",
-            headers=self.headers, json=wiql)
-        response.raise_for_status()
-        story_data = response.json().get("workItems", [])
-
-        story_ids = [item["id"] for item in story_data]
-        if not story_ids:
-            return []
-
-        response = requests.post(
-            f"https://dev.azure.com/{AZURE_CONFIG['ORGANIZATION']}/{AZURE_CONFIG['PROJECT']}/_apis/wit/workitemsbatch?api-version=6.0",
-            headers=self.headers,
-            json={"ids": story_ids, "fields": ["System.Id", "System.Title", "System.State", "System.AssignedTo"]}
-        )
-        response.raise_for_status()
-        stories = response.json().get("value", [])
-
-        result = []
-        for story in stories:
-            story_id = story["id"]
-            story_title = story["fields"].get("System.Title", "")
-            story_state = story["fields"].get("System.State", "")
-            story_dev = story["fields"].get("System.AssignedTo", {}).get("displayName", "Não atribuído")
-
-            rels = requests.get(
-                f"https://dev.azure.com/{AZURE_CONFIG['ORGANIZATION']}/{AZURE_CONFIG['PROJECT']}/_apis/wit/workitems/{story_id}?$expand=relations&api-version=6.0",
-                headers=self.headers
-            )
-            rels.raise_for_status()
-            relations = rels.json().get("relations", [])
-            task_ids = [int(r["url"].split("/")[-1]) for r in relations if "System.LinkTypes.Hierarchy-Forward" in r.get("rel", "")]
-
-            if not task_ids:
-                total_hours = 0
-            else:
-                task_batch = requests.post(
-                    f"https://dev.azure.com/{AZURE_CONFIG['ORGANIZATION']}/{AZURE_CONFIG['PROJECT']}/_apis/wit/workitemsbatch?api-version=6.0",
-                    headers=self.headers,
-                    json={"ids": task_ids, "fields": ["Microsoft.VSTS.Scheduling.CompletedWork"]}
-                )
-                task_batch.raise_for_status()
-                tasks = task_batch.json().get("value", [])
-                total_hours = sum(t.get("fields", {}).get("Microsoft.VSTS.Scheduling.CompletedWork", 0) for t in tasks)
-
-            result.append({
-                "id": story_id,
-                "title": story_title,
-                "state": story_state,
-                "dev": story_dev,
-                "completed_work": total_hours
-            })
-
-        return result
-def mostrar_card_performance(work_items):
+def mostrar_card_performance(agregados):
     st.markdown("## 📈 Performance da Sprint")
-    tasks = [wi for wi in work_items if wi['fields'].get('System.WorkItemType') == 'Task']
-    planejadas = [t for t in tasks if '[nãoplanejada]' not in t['fields'].get('System.Title', '').lower()]
-    nao_planejadas = [t for t in tasks if '[nãoplanejada]' in t['fields'].get('System.Title', '').lower()]
-
-    planejadas_done = [t for t in planejadas if t['fields'].get('System.State', '').lower() in ['done', 'concluído', 'finalizado']]
-    nao_planejadas_done = [t for t in nao_planejadas if t['fields'].get('System.State', '').lower() in ['done', 'concluído', 'finalizado']]
-
-    total_tasks_done = [t for t in tasks if t['fields'].get('System.State', '').lower() in ['done', 'concluído', 'finalizado']]
-
-    # Cálculos
-    total_planejadas = len(planejadas)
-    total_planejadas_done = len(planejadas_done)
-    total_nao_planejadas = len(nao_planejadas)
-    total_nao_planejadas_done = len(nao_planejadas_done)
-    total_done = len(total_tasks_done)
-
-    perf_planejadas = (total_planejadas_done / total_planejadas * 100) if total_planejadas else 0
-    perf_nao_planejadas = (total_nao_planejadas_done / total_nao_planejadas * 100) if total_nao_planejadas else 0
-    perf_geral = (total_done / (total_planejadas + total_nao_planejadas) * 100) if (total_planejadas + total_nao_planejadas) else 0
+    perf = agregados.performance_tasks()
+    total_planejadas = perf["total_planejadas"]
+    total_planejadas_done = perf["total_planejadas_done"]
+    total_nao_planejadas = perf["total_nao_planejadas"]
+    total_nao_planejadas_done = perf["total_nao_planejadas_done"]
+    total_done = perf["total_done"]
+    perf_planejadas = perf["perf_planejadas"]
+    perf_nao_planejadas = perf["perf_nao_planejadas"]
+    perf_geral = perf["perf_geral"]
 
     st.markdown("### 📊 Resultados da Sprint")
     st.write(f"**Total de Tasks Planejadas:** {total_planejadas}")
@@ -208,49 +40,69 @@ def mostrar_card_performance(work_items):
     st.write(f"**Quantidade de Tasks Não Planejadas:** {total_nao_planejadas}")
     st.write(f"**Quantidade de Não Planejadas Done:** {total_nao_planejadas_done}")
     st.write(f"**Performance Não Planejadas:** {perf_nao_planejadas:.1f}%")
-    
 
-# Adição no Dashboard (interface)
-def exibir_atividades_nao_planejadas(grouped_data):
-    st.markdown("## 🔧 Atividades Não Planejadas")
-    rows = []
-    for dev, dados in grouped_data.items():
-        for item in dados["items"]:
-            if "[nãoplanejada]" in item["title"].lower():
-                rows.append({
-                    "ID": item["id"],
-                    "Título": item["title"],
-                    "Status": item["state"],
-                    "Desenvolvedor": dev,
-                    "Horas Trabalhadas": item["completed_work"]
-                })
-    if rows:
-        df = pd.DataFrame(rows)
-        st.dataframe(df)
-    else:
-        st.write("✅ Nenhuma atividade não planejada encontrada.")
 
-def exibir_atividades_sustentacao(grouped_data):
-    st.markdown("## 🛠️ Atividades de Sustentação")
-    rows = []
-    for dev, dados in grouped_data.items():
-        for item in dados["items"]:
-            if "[sustentação]" in item["title"].lower():
-                rows.append({
-                    "ID": item["id"],
-                    "Título": item["title"],
-                    "Status": item["state"],
-                    "Desenvolvedor": dev,
-                    "Horas Trabalhadas": item["completed_work"]
-                })
-    if rows:
-        df = pd.DataFrame(rows)
-        st.dataframe(df)
-    else:
-        st.write("✅ Nenhuma atividade de sustentação encontrada.")
+def _fins_das_proximas_sprints(sprint, quantidade):
+    """Data de fim da sprint atual e das `quantidade` seguintes (as não cadastradas seguem a cadência)"""
+    iteracoes, _ = carregar_iteracoes()
+    posicao = next(i for i, it in enumerate(iteracoes) if it["path"] == sprint["path"])
+    fins = [sprint["fim"]] + [
+        datetime.strptime(it["attributes"]["finishDate"], '%Y-%m-%dT%H:%M:%SZ')
+        for it in iteracoes[posicao + 1:posicao + 1 + quantidade] if it["attributes"].get("finishDate")
+    ]
+    duracao = sprint["fim"] - sprint["inicio"] + pd.Timedelta(days=1)
+    while len(fins) <= quantidade:
+        fins.append(fins[-1] + duracao)
+    return fins
+
+
+@st.fragment
+def mostrar_card_previsao(sprint):
+    # Fragmento: mudar os filtros só refaz a simulação, não a página inteira
+    st.markdown("## 🔮 Previsão de Entrega (Monte Carlo)")
+    # O histórico só é buscado quando o card é desenhado, e em cache por sprint passada
+    with st.spinner("Carregando o throughput das sprints anteriores..."):
+        historico = carregar_historico(sprint["path"])
+    if not historico:
+        st.info("Sem sprints anteriores para usar como histórico.")
+        return
+
+    agregados = sprint["agregados"]
+    col1, col2 = st.columns(2)
+    tipos = col1.multiselect("Tipos", ["Task", "Bug"], default=["Task", "Bug"], key="previsao_tipos")
+    devs = col2.multiselect("Desenvolvedores (vazio: todos)", sorted(agregados.por_dev), key="previsao_devs") or None
+
+    throughput = [somar_concluidos(contagem, tipos, devs) for contagem in historico]
+    concluidos = contar_concluidos(agregados, tipos, devs)
+    abertos = contar_abertos(agregados, tipos, devs)
+    hoje = pd.Timestamp.now().normalize()
+    dias_sprint = SprintAnalyzer.calcular_dias_uteis(sprint["inicio"], sprint["fim"])
+    dias_restantes = SprintAnalyzer.calcular_dias_uteis(max(hoje, pd.Timestamp(sprint["inicio"])), sprint["fim"])
+    fracao_restante = dias_restantes / dias_sprint if dias_sprint else 0
+
+    resultado = prever(throughput, concluidos, abertos, fracao_restante)
+    st.caption(
+        f"Throughput das últimas {len(historico)} sprints: {', '.join(map(str, throughput))} itens · "
+        f"{concluidos} concluídos e {abertos} abertos na sprint atual · {dias_restantes} dias úteis restantes"
+    )
+
+    horizonte = max((s for s in resultado["sprints"].values() if s is not None), default=0)
+    fins = _fins_das_proximas_sprints(sprint, horizonte)
+    linhas = []
+    for confianca in CONFIANCAS:
+        sprints = resultado["sprints"][confianca]
+        linhas.append({
+            "Confiança": f"{confianca}%",
+            "Concluídos até o fim da sprint (pelo menos)": resultado["itens"][confianca],
+            "Sprints além da atual para zerar os abertos": sprints if sprints is not None else "—",
+            "Previsão de término": fins[sprints].strftime('%d/%m/%Y') if sprints is not None else "além do horizonte"
+        })
+    st.dataframe(pd.DataFrame(linhas), use_container_width=True, hide_index=True)
+
+
 # HTML Export Function
 
-def gerar_html_cards(grouped_data, sprint_title, periodo, dias_uteis):
+def gerar_html_cards(grouped_data, sprint_title, periodo):
     html = f"""
     <html><head><meta charset='UTF-8'>
     <style>
@@ -268,15 +120,14 @@ def gerar_html_cards(grouped_data, sprint_title, periodo, dias_uteis):
     """
 
     for dev, dados in grouped_data.items():
-        total_itens = len(dados["items"])
-        horas_planejadas = dias_uteis * 7
-        nao_planejadas = [i for i in dados["items"] if "[nãoplanejada]" in i["title"].lower()]
-        concluidos = [i for i in dados["items"] if i["state"].lower() in ["done", "concluído", "finalizado"]]
-        horas_trabalhadas = sum(i["completed_work"] for i in dados["items"] if i["completed_work"] is not None)
-        itens_planejados = total_itens - len(nao_planejadas)
-        itens_concluidos = len(concluidos)
-        performance = (itens_concluidos / itens_planejados * 100) if itens_planejados else 0
-        diferenca_horas = horas_trabalhadas - horas_planejadas
+        total_itens = dados["total_items"]
+        horas_planejadas = dados["horas_planejadas"]
+        nao_planejadas = dados["nao_planejadas"]
+        horas_trabalhadas = dados["horas_trabalhadas"]
+        itens_planejados = dados["itens_planejados"]
+        itens_concluidos = dados["itens_concluidos"]
+        performance = dados["performance"]
+        diferenca_horas = dados["diferenca_horas"]
 
         html += f"""
         <div class='card'>
@@ -285,7 +136,7 @@ def gerar_html_cards(grouped_data, sprint_title, periodo, dias_uteis):
                 <li><strong>Total de Itens:</strong> {total_itens}</li>
                 <li><strong>Horas Planejadas:</strong> {horas_planejadas}</li>
                 <li><strong>Atividades Planejadas:</strong> {itens_planejados}</li>
-                <li><strong>Atividades Não Planejadas:</strong> {len(nao_planejadas)}</li>
+                <li><strong>Atividades Não Planejadas:</strong> {nao_planejadas}</li>
                 <li><strong>Itens Concluídos:</strong> {itens_concluidos}</li>
                 <li><strong>Horas Trabalhadas:</strong> {horas_trabalhadas:.1f}</li>
                 <li><strong>Diferença de Horas:</strong> {diferenca_horas:+.1f}h</li>
@@ -298,7 +149,7 @@ def gerar_html_cards(grouped_data, sprint_title, periodo, dias_uteis):
                 <tbody>
         """
         for item in dados["items"]:
-            html += f"<tr><td>{item['id']}</td><td>{item['title']}</td><td>{item['tipo']}</td><td>{item['state']}</td><td>{item['completed_work']}</td></tr>"
+            html += f"<tr><td>{item.id}</td><td>{item.title}</td><td>{item.tipo}</td><td>{item.state}</td><td>{item.completed_work}</td></tr>"
         html += "</tbody></table></div>"
 
     html += "</body></html>"
@@ -306,63 +157,22 @@ def gerar_html_cards(grouped_data, sprint_title, periodo, dias_uteis):
 
     # Função adicional para mostrar user stories
 
-def mostrar_card_userstories(user_stories):
+def mostrar_card_userstories(tabela):
     st.markdown("## 📘 User Stories da Sprint")
+    st.write(f"Total de User Stories: {len(tabela)}")
+    tabela_paginada("userstories", tabela)
 
-    story_info = []
-    for us in user_stories:
-        story_info.append({
-            'ID': us['id'],
-            'Título': us['title'],
-            'Status': us['state'],
-            'Desenvolvedor': us['dev'],
-            'Horas Trabalhadas': us['completed_work']
-        })
-
-    st.write(f"Total de User Stories: {len(story_info)}")
-    df_us = pd.DataFrame(story_info)
-    st.dataframe(df_us)
-
-def mostrar_card_tasks_done(work_items):
+def mostrar_card_tasks_done(tabela):
     st.markdown("## ✅ Tasks Concluídas")
-    done_tasks = [wi for wi in work_items if wi['fields'].get('System.WorkItemType') == 'Task' and wi['fields'].get('System.State', '').lower() in ['done', 'concluído', 'finalizado']]
-
-    task_info = []
-    for task in done_tasks:
-        task_info.append({
-            'ID': task['id'],
-            'Título': task['fields'].get('System.Title', ''),
-            'Status': task['fields'].get('System.State', ''),
-            'Desenvolvedor': task['fields'].get('System.AssignedTo', {}).get('displayName', 'Não atribuído'),
-            'Horas Trabalhadas': task['fields'].get('Microsoft.VSTS.Scheduling.CompletedWork', 0)
-        })
-
-    st.write(f"Total de Tasks Done: {len(task_info)}")
-    df_tasks = pd.DataFrame(task_info)
-    st.dataframe(df_tasks)
+    st.write(f"Total de Tasks Done: {len(tabela)}")
+    tabela_paginada("tasks_done", tabela)
 
 
-def mostrar_card_bugs(work_items):
+def mostrar_card_bugs(tabela):
     st.markdown("## 🐞 Bugs da Sprint")
-    bugs = [wi for wi in work_items if wi['fields'].get('System.WorkItemType') == 'Bug']
-
-    bug_info = []
-    total_horas = 0
-    for bug in bugs:
-        horas = bug['fields'].get('Microsoft.VSTS.Scheduling.CompletedWork', 0)
-        total_horas += horas
-        bug_info.append({
-            'ID': bug['id'],
-            'Título': bug['fields'].get('System.Title', ''),
-            'Status': bug['fields'].get('System.State', ''),
-            'Desenvolvedor': bug['fields'].get('System.AssignedTo', {}).get('displayName', 'Não atribuído'),
-            'Horas Trabalhadas': horas
-        })
-
-    st.write(f"Total de Bugs: {len(bug_info)}")
-    st.write(f"Horas trabalhadas nos bugs: {total_horas:.1f}h")
-    df_bugs = pd.DataFrame(bug_info)
-    st.dataframe(df_bugs)
+    st.write(f"Total de Bugs: {len(tabela)}")
+    st.write(f"Horas trabalhadas nos bugs: {tabela.soma('Horas Trabalhadas'):.1f}h")
+    tabela_paginada("bugs", tabela)
 
 
 # Versão para HTML exportado
@@ -386,7 +196,7 @@ def gerar_html_userstories_card(user_stories):
     return html
 
 def gerar_html_tasks_done_card(work_items):
-    done_tasks = [wi for wi in work_items if wi['fields'].get('System.WorkItemType') == 'Task' and wi['fields'].get('System.State', '').lower() in ['done', 'concluído', 'finalizado']]
+    done_tasks = [wi for wi in work_items if wi.tipo == 'Task' and wi.state.lower() in ['done', 'concluído', 'finalizado']]
     html = f"""
     <div class='card'>
         <h2>✅ Tasks Concluídas</h2>
@@ -397,14 +207,14 @@ def gerar_html_tasks_done_card(work_items):
             </tr></thead><tbody>
     """
     for task in done_tasks:
-        html += f"<tr><td>{task['id']}</td><td>{task['fields'].get('System.Title', '')}</td><td>{task['fields'].get('System.State', '')}</td><td>{task['fields'].get('System.AssignedTo', {}).get('displayName', 'Não atribuído')}</td><td>{task['fields'].get('Microsoft.VSTS.Scheduling.CompletedWork', 0)}</td></tr>"
+        html += f"<tr><td>{task.id}</td><td>{task.title}</td><td>{task.state}</td><td>{task.dev}</td><td>{task.completed_work}</td></tr>"
     html += "</tbody></table></div>"
     return html
 
 
 def gerar_html_bugs_card(work_items):
-    bugs = [wi for wi in work_items if wi['fields'].get('System.WorkItemType') == 'Bug']
-    total_horas = sum(bug['fields'].get('Microsoft.VSTS.Scheduling.CompletedWork', 0) for bug in bugs)
+    bugs = [wi for wi in work_items if wi.tipo == 'Bug']
+    total_horas = sum(bug.completed_work for bug in bugs)
     html = f"""
     <div class='card'>
         <h2>🐞 Bugs da Sprint</h2>
@@ -416,15 +226,15 @@ def gerar_html_bugs_card(work_items):
             </tr></thead><tbody>
     """
     for bug in bugs:
-        html += f"<tr><td>{bug['id']}</td><td>{bug['fields'].get('System.Title', '')}</td><td>{bug['fields'].get('System.State', '')}</td><td>{bug['fields'].get('System.AssignedTo', {}).get('displayName', 'Não atribuído')}</td><td>{bug['fields'].get('Microsoft.VSTS.Scheduling.CompletedWork', 0)}</td></tr>"
+        html += f"<tr><td>{bug.id}</td><td>{bug.title}</td><td>{bug.state}</td><td>{bug.dev}</td><td>{bug.completed_work}</td></tr>"
     html += "</tbody></table></div>"
     return html
 def gerar_html_sustentacao_card(grouped_data):
     atividades_sustentacao = [
-        (item['id'], item['title'], item['state'], dev, item['completed_work'])
+        (item.id, item.title, item.state, dev, item.completed_work)
         for dev, dados in grouped_data.items()
         for item in dados['items']
-        if '[sustentação]' in item['title'].lower()
+        if '[sustentação]' in item.title.lower()
     ]
 
     total = len(atividades_sustentacao)
@@ -446,25 +256,16 @@ def gerar_html_sustentacao_card(grouped_data):
     html += "</tbody></table></div>"
     return html
 
-def gerar_html_performance_card(work_items):
-    tasks = [wi for wi in work_items if wi['fields'].get('System.WorkItemType') == 'Task']
-    planejadas = [t for t in tasks if '[nãoplanejada]' not in t['fields'].get('System.Title', '').lower()]
-    nao_planejadas = [t for t in tasks if '[nãoplanejada]' in t['fields'].get('System.Title', '').lower()]
-
-    planejadas_done = [t for t in planejadas if t['fields'].get('System.State', '').lower() in ['done', 'concluído', 'finalizado']]
-    nao_planejadas_done = [t for t in nao_planejadas if t['fields'].get('System.State', '').lower() in ['done', 'concluído', 'finalizado']]
-
-    total_tasks_done = [t for t in tasks if t['fields'].get('System.State', '').lower() in ['done', 'concluído', 'finalizado']]
-
-    total_planejadas = len(planejadas)
-    total_planejadas_done = len(planejadas_done)
-    total_nao_planejadas = len(nao_planejadas)
-    total_nao_planejadas_done = len(nao_planejadas_done)
-    total_done = len(total_tasks_done)
-
-    perf_planejadas = (total_planejadas_done / total_planejadas * 100) if total_planejadas else 0
-    perf_nao_planejadas = (total_nao_planejadas_done / total_nao_planejadas * 100) if total_nao_planejadas else 0
-    perf_geral = (total_done / (total_planejadas + total_nao_planejadas) * 100) if (total_planejadas + total_nao_planejadas) else 0
+def gerar_html_performance_card(agregados):
+    perf = agregados.performance_tasks()
+    total_planejadas = perf["total_planejadas"]
+    total_planejadas_done = perf["total_planejadas_done"]
+    total_nao_planejadas = perf["total_nao_planejadas"]
+    total_nao_planejadas_done = perf["total_nao_planejadas_done"]
+    total_done = perf["total_done"]
+    perf_planejadas = perf["perf_planejadas"]
+    perf_nao_planejadas = perf["perf_nao_planejadas"]
+    perf_geral = perf["perf_geral"]
 
     html = f"""
     <div class='card'>
@@ -487,43 +288,49 @@ def gerar_html_performance_card(work_items):
     """
     return html
 
-def exibir_atividades_sustentacao(grouped_data):
+def exibir_atividades_sustentacao(tabela):
     st.markdown("## 🛠️ Atividades de Sustentação")
-    rows = []
-    for dev, dados in grouped_data.items():
-        for item in dados["items"]:
-            if "[sustentação]" in item["title"].lower():
-                rows.append({
-                    "ID": item["id"],
-                    "Título": item["title"],
-                    "Status": item["state"],
-                    "Desenvolvedor": dev,
-                    "Horas Trabalhadas": item["completed_work"]
-                })
-    
-    if rows:
-        df = pd.DataFrame(rows)
-        total_horas = df["Horas Trabalhadas"].sum()
-        st.markdown(f"**Total de Atividades:** {len(rows)} | Horas Trabalhadas:**{total_horas:.1f}h**")
-        st.dataframe(df)
+    if len(tabela):
+        st.markdown(f"**Total de Atividades:** {len(tabela)} | Horas Trabalhadas:**{tabela.soma('Horas Trabalhadas'):.1f}h**")
+        tabela_paginada("sustentacao", tabela)
     else:
         st.success("✅ Nenhuma atividade de sustentação encontrada.")
 
+def gerar_html_relatorio(sprint_title, inicio_sprint, fim_sprint, agrupados, user_stories, work_items):
+    """Relatório completo da sprint (o mesmo do botão de download e do relatorios.py)"""
+    html_cards = gerar_html_cards(
+        grouped_data=agrupados,
+        sprint_title=sprint_title,
+        periodo=f"{inicio_sprint.strftime('%d/%m/%Y')} a {fim_sprint.strftime('%d/%m/%Y')}"
+    )
+    html_cards += gerar_html_userstories_card(user_stories)
+    html_cards += gerar_html_tasks_done_card(work_items)
+    html_cards += gerar_html_sustentacao_card(agrupados)
+    html_cards += gerar_html_bugs_card(work_items)
+    return html_cards
+
 # Business Logic
 class SprintAnalyzer:
     @staticmethod
     def calcular_dias_uteis(inicio, fim):
         """Calcula dias úteis excluindo finais de semana e feriados"""
-        datas = pd.date_range(start=inicio, end=fim, freq='B')
-        return sum(1 for data in datas if data.strftime('%d-%m') not in FERIADOS)
+        return dias_uteis(inicio, fim)
     
     @staticmethod
-    def calcular_metricas_gerais(work_items, inicio_sprint, fim_sprint):
-        total_completed = sum(1 for wi in work_items if wi['fields'].get('System.State', '').lower() == 'done')
-        total_items = len(work_items)
-        dias_uteis = SprintAnalyzer.calcular_dias_uteis(inicio_sprint, fim_sprint)
-        total_estimated = dias_uteis * AZURE_CONFIG['WORKING_HOURS_PER_DAY'] * AZURE_CONFIG['DEFAULT_DEV_COUNT']
-        total_worked = sum(wi['fields'].get('Microsoft.VSTS.Scheduling.CompletedWork', 0) for wi in work_items)
+    def calcular_metricas_gerais(agregados, inicio_sprint, fim_sprint, dev_count=None, capacidade=None):
+        total_completed = agregados.totais["done"]
+        total_items = agregados.totais["itens"]
+        if capacidade and capacidade["devs"]:
+            # Capacidade cadastrada no Azure DevOps, já sem folgas e feriados, mais o mesmo
+            # fallback de agrupar_por_dev para quem tem itens e não está no cadastro
+            dias_uteis, capacidade_devs = SprintAnalyzer._capacidade_devs(inicio_sprint, fim_sprint, capacidade)
+            sem_cadastro = [dev for dev in agregados.por_dev if dev not in capacidade_devs]
+            total_estimated = (sum(dev["horas"] for dev in capacidade_devs.values())
+                               + sum(SprintAnalyzer._horas_dev(capacidade_devs, dev, dias_uteis) for dev in sem_cadastro))
+        else:
+            dias_uteis = SprintAnalyzer.calcular_dias_uteis(inicio_sprint, fim_sprint)
+            total_estimated = dias_uteis * AZURE_CONFIG['WORKING_HOURS_PER_DAY'] * (dev_count or AZURE_CONFIG['DEFAULT_DEV_COUNT'])
+        total_worked = agregados.totais["horas"]
         
         return {
             "total_items": total_items,
@@ -535,49 +342,50 @@ class SprintAnalyzer:
         }
     
     @staticmethod
-    def agrupar_por_dev(work_items, inicio_sprint, fim_sprint):
-        por_dev = defaultdict(lambda: {
-            "total_completed_work": 0,
-            "total_original_estimate": 0,
-            "items": [],
-            "completed_items": 0,
-            "total_items": 0
-        })
+    def combinar_metricas(lista_metricas):
+        """Soma as métricas gerais de vários times e recalcula as taxas do conjunto"""
+        soma = {
+            campo: sum(m[campo] for m in lista_metricas)
+            for campo in ("total_items", "completed_items", "total_estimated", "total_worked")
+        }
+        return {
+            **soma,
+            "completion_rate": (soma["completed_items"] / soma["total_items"] * 100) if soma["total_items"] else 0,
+            "efficiency": (soma["total_worked"] / soma["total_estimated"] * 100) if soma["total_estimated"] else 0
+        }
 
-        dias_uteis = SprintAnalyzer.calcular_dias_uteis(inicio_sprint, fim_sprint)
-        horas_por_dev = dias_uteis * AZURE_CONFIG['WORKING_HOURS_PER_DAY']
+    @staticmethod
+    def _capacidade_devs(inicio_sprint, fim_sprint, capacidade=None):
+        """(dias úteis, capacidade por dev) da sprint; sem cadastro, o calendário e nenhum dev"""
+        if capacidade:
+            return capacidade["dias_uteis"], capacidade["devs"]
+        return SprintAnalyzer.calcular_dias_uteis(inicio_sprint, fim_sprint), {}
 
-        for wi in work_items:
-            if wi['fields'].get('System.WorkItemType', '') == 'User Story':
-                continue
-            dev = wi['fields'].get('System.AssignedTo', {}).get('displayName', 'Não atribuído')
-            completed_work = wi['fields'].get('Microsoft.VSTS.Scheduling.CompletedWork', 0)
-            state = wi['fields'].get('System.State', '')
-            
-            por_dev[dev]["total_completed_work"] += completed_work or 0
-            por_dev[dev]["total_items"] += 1
-            if state.lower() == 'done':
-                por_dev[dev]["completed_items"] += 1
-                
-            por_dev[dev]["items"].append({
-                "id": wi['id'],
-                "title": wi['fields'].get('System.Title', ''),
-                "tipo": wi['fields'].get('System.WorkItemType', ''),
-                "completed_work": completed_work or 0,
-                "state": state,
-                "deviation": 0
-            })
-
-        # Atribui as horas fixas por desenvolvedor (7h/dia * dias úteis)
-        for dev, dados in por_dev.items():
-            dados["total_original_estimate"] = horas_por_dev
-            
-            if dados["total_items"] > 0:
-                estimate_por_item = round(horas_por_dev / dados["total_items"], 1)
-                for item in dados["items"]:
-                    item["original_estimate"] = estimate_por_item
-                    item["deviation"] = round(item["completed_work"] - estimate_por_item, 1)
-                    
+    @staticmethod
+    def _horas_dev(capacidade_devs, dev, dias_uteis):
+        """Horas da capacidade do dev; sem cadastro, 7h/dia * dias úteis"""
+        capacidade_dev = capacidade_devs.get(dev)
+        return capacidade_dev["horas"] if capacidade_dev else dias_uteis * AZURE_CONFIG['WORKING_HOURS_PER_DAY']
+
+    @staticmethod
+    def agrupar_por_dev(agregados, inicio_sprint, fim_sprint, capacidade=None):
+        """Monta a visão por dev a partir dos agregados da sprint (custo por dev, não por item)"""
+        dias_uteis, capacidade_devs = SprintAnalyzer._capacidade_devs(inicio_sprint, fim_sprint, capacidade)
+
+        por_dev = {}
+        for dev, linha in agregados.por_dev.items():
+            capacidade_dev = capacidade_devs.get(dev)
+            horas_por_dev = SprintAnalyzer._horas_dev(capacidade_devs, dev, dias_uteis)
+            por_dev[dev] = {
+                "items": agregados.itens_por_dev[dev],
+                "total_items": linha["total_itens"],
+                "completed_items": linha["done"],
+                "total_completed_work": linha["horas_trabalhadas"],
+                "total_original_estimate": horas_por_dev,
+                "dias_disponiveis": capacidade_dev["dias_disponiveis"] if capacidade_dev else dias_uteis,
+                "dias_folga": capacidade_dev["dias_folga"] if capacidade_dev else 0,
+                **agregados.resumo_dev(dev, horas_por_dev)
+            }
         return por_dev
 
 # Visualization
@@ -595,19 +403,18 @@ class Dashboard:
         st.metric("Taxa de Conclusão (%)", f"{metrics['completion_rate']:.1f}%")
     
     @staticmethod
-    def show_dev_details(grouped_data, dias_uteis):
+    def show_dev_details(grouped_data, tabelas_devs):
         st.markdown("## 👨‍💻 Detalhamento por Desenvolvedor")
         for dev, dados in grouped_data.items():
             with st.expander(f"👤 {dev}"):
-                total_itens = len(dados["items"])
-                horas_planejadas = dias_uteis * 7
-                nao_planejadas = [item for item in dados["items"] if "[nãoplanejada]" in item["title"].lower()]
-                concluidos = [item for item in dados["items"] if item["state"].lower() in ["done", "concluído", "finalizado"]]
-                horas_trabalhadas = sum(item["completed_work"] for item in dados["items"] if item["completed_work"] is not None)
+                total_itens = dados["total_items"]
+                horas_planejadas = dados["horas_planejadas"]
+                nao_planejadas = dados["nao_planejadas"]
+                horas_trabalhadas = dados["horas_trabalhadas"]
 
-                itens_planejados = total_itens - len(nao_planejadas)
-                itens_concluidos = len(concluidos)
-                performance = (itens_concluidos / itens_planejados) * 100 if itens_planejados else 0
+                itens_planejados = dados["itens_planejados"]
+                itens_concluidos = dados["itens_concluidos"]
+                performance = dados["performance"]
 
                 if performance >= 100:
                     icone = "💡"
@@ -616,16 +423,19 @@ class Dashboard:
                 else:
                     icone = "⚠️"
 
-                diferenca_horas = horas_trabalhadas - horas_planejadas
+                diferenca_horas = dados["diferenca_horas"]
+                dias_disponiveis = dados["dias_disponiveis"]
+                dias_folga = dados["dias_folga"]
 
                 card_html = f"""
                     <div style="border: 1px solid #ccc; border-radius: 12px; padding: 16px; margin: 10px 0; background-color: #f9f9f9;">
                         <h4>👤 {dev}</h4>
                         <ul style="list-style-type: none; padding-left: 0; line-height: 1.8;">
                             <li><strong>Total de Itens:</strong> {total_itens}</li>
+                            <li><strong>Dias Disponíveis:</strong> {dias_disponiveis} ({dias_folga} de folga)</li>
                             <li><strong>Horas Planejadas:</strong> {horas_planejadas}</li>
                             <li><strong>Atividades Planejadas:</strong> {itens_planejados}</li>
-                            <li><strong>Atividades Não Planejadas:</strong> {len(nao_planejadas)}</li>
+                            <li><strong>Atividades Não Planejadas:</strong> {nao_planejadas}</li>
                             <li><strong>Itens Concluídos:</strong> {itens_concluidos}</li>
                             <li><strong>Horas Trabalhadas:</strong> {horas_trabalhadas:.1f}</li>
                             <li><strong>Diferença de Horas:</strong> {diferenca_horas:+.1f}h</li>
@@ -636,8 +446,7 @@ class Dashboard:
                 st.markdown(card_html, unsafe_allow_html=True)
                 st.progress(min(performance / 100, 1.0))
 
-                df = pd.DataFrame(dados["items"])
-                st.dataframe(df[["id", "title", "tipo", "state", "completed_work"]])
+                tabela_paginada(f"dev_{dev}", tabelas_devs[dev])
     
     @staticmethod
     def show_comparison_chart(grouped_data):
@@ -658,7 +467,7 @@ class Dashboard:
         # Gráfico de barras comparativo
         bar_largura = 0.35
         indices = range(len(devs))
-        ax1.bar(indices, estimadas, width=bar_largura, label='Estimado (7h/dia)', color='skyblue')
+        ax1.bar(indices, estimadas, width=bar_largura, label='Estimado (capacidade)', color='skyblue')
         ax1.bar([i + bar_largura for i in indices], realizadas, width=bar_largura, 
               label='Trabalhado', color='orange')
         ax1.set_xticks([i + bar_largura / 2 for i in indices])
@@ -677,99 +486,91 @@ class Dashboard:
 
         plt.tight_layout()
         st.pyplot(fig)
-def create_sprint_selector(api):
-    all_iterations = api.get_all_iterations()
-    
-    # Filtra apenas as iterações com data de início válida
-    all_iterations = [it for it in all_iterations if it["attributes"].get("startDate")]
-
-    # Ordena por data de início
-    all_iterations.sort(key=lambda it: it["attributes"]["startDate"])
-
-    # Pega a sprint atual
-    current_path, _, _ = api.get_current_iteration()
-    current_index = next(i for i, it in enumerate(all_iterations) if it["path"] == current_path)
-
-    # Seleciona 2 anteriores, a atual e 2 futuras
-    start = max(current_index - 2, 0)
-    end = min(current_index + 3, len(all_iterations))
-    visible_sprints = all_iterations[start:end]
-
-    sprint_names = [it["name"] for it in visible_sprints]
-    default_index = next(i for i, it in enumerate(visible_sprints) if it["path"] == current_path)
-
-    selected_name = st.selectbox("📅 Selecione a Sprint", sprint_names, index=default_index)
-    selected_path = next(it["path"] for it in visible_sprints if it["name"] == selected_name)
-
-    return selected_path
 # Main Application
 def main():
     st.set_page_config(layout="wide")
     st.title("📊 Sprint Review Dashboard")
 
-    azure_api = AzureDevOpsAPI()
     analyzer = SprintAnalyzer()
     dashboard = Dashboard()
+    perfil = Profiler().iniciar() if perfil_solicitado() else Profiler()
     
     with st.spinner("Carregando dados da sprint..."):
         try:
-            iteration_path = create_sprint_selector(azure_api)
-            ids_with_estimates = azure_api.get_work_item_ids(iteration_path)
-            if not ids_with_estimates:
+            with perfil.etapa("Carga dos dados (API / cache)"):
+                iteration_path = create_sprint_selector()
+                sprint = carregar_sprint(iteration_path)
+            work_items = sprint["work_items"]
+            if not work_items:
                 st.warning("⚠️ Nenhum Work Item encontrado na sprint selecionada.")
                 return
+
+            with perfil.etapa("SprintAnalyzer"):
+                inicio_sprint = sprint["inicio"]
+                fim_sprint = sprint["fim"]
+                dias_uteis = analyzer.calcular_dias_uteis(inicio_sprint, fim_sprint)
+
+                agregados = sprint["agregados"]
+                capacidade = sprint.get("capacidade")
+                metricas_gerais = analyzer.calcular_metricas_gerais(agregados, inicio_sprint, fim_sprint, capacidade=capacidade)
+                agrupados = analyzer.agrupar_por_dev(agregados, inicio_sprint, fim_sprint, capacidade)
+
+            with perfil.etapa("Dashboard"):
+                st.subheader(f"🗓 Sprint Selecionada: `{iteration_path}`")
+                st.write(f"Período: {inicio_sprint.strftime('%d/%m/%Y')} a {fim_sprint.strftime('%d/%m/%Y')}")
+                st.write(f"Dias úteis: {dias_uteis} dias")
+
+                dashboard.show_metrics(metricas_gerais)
+                user_stories = derivar_user_stories(work_items)
+                # Tabelas indexadas da versão atual da sprint; cada card envia só a página visível
+                tabelas = carregar_tabelas(sprint)
+                mostrar_card_userstories(tabelas["user_stories"])
+                mostrar_card_tasks_done(tabelas["tasks_done"])
+                mostrar_card_bugs(tabelas["bugs"])
+                exibir_atividades_sustentacao(tabelas["sustentacao"])
+                mostrar_card_performance(agregados)
+                mostrar_card_previsao(sprint)
+
+                # ✅ Horas planejadas (capacidade de cada dev na sprint) já vêm em cada dev de agrupados
+                dashboard.show_dev_details(agrupados, tabelas["devs"])
+                dashboard.show_comparison_chart(agrupados)
+
+            with perfil.etapa("Relatório e exportações"):
+                st.markdown("## 📄 Exportar Relatório (HTML para PDF)")
             
-            work_items = azure_api.get_work_items_details(ids_with_estimates)
-            all_iterations = azure_api.get_all_iterations()
-            selected_iteration = next(it for it in all_iterations if it["path"] == iteration_path)
-            
-            inicio_sprint = datetime.strptime(selected_iteration['attributes']['startDate'], '%Y-%m-%dT%H:%M:%SZ')
-            fim_sprint = datetime.strptime(selected_iteration['attributes']['finishDate'], '%Y-%m-%dT%H:%M:%SZ')
-            dias_uteis = analyzer.calcular_dias_uteis(inicio_sprint, fim_sprint)
-
-            metricas_gerais = analyzer.calcular_metricas_gerais(work_items, inicio_sprint, fim_sprint)
-            agrupados = analyzer.agrupar_por_dev(work_items, inicio_sprint, fim_sprint)
-
-            st.subheader(f"🗓 Sprint Selecionada: `{iteration_path}`")
-            st.write(f"Período: {inicio_sprint.strftime('%d/%m/%Y')} a {fim_sprint.strftime('%d/%m/%Y')}")
-            st.write(f"Dias úteis: {dias_uteis} dias")
-
-            dashboard.show_metrics(metricas_gerais)
-            user_stories = azure_api.get_user_stories_with_task_hours(iteration_path)
-            mostrar_card_userstories(user_stories)
-            mostrar_card_tasks_done(work_items)
-            mostrar_card_bugs(work_items)
-            exibir_atividades_sustentacao(agrupados)
-            mostrar_card_performance(work_items)
-
-            # ✅ Aqui passa o parâmetro dias_uteis
-            dashboard.show_dev_details(agrupados, dias_uteis)
-            dashboard.show_comparison_chart(agrupados)
-       
-
-            st.markdown("## 📄 Exportar Relatório (HTML para PDF)")
-            
-            # ✅ Também usa dias_uteis aqui
-            html_cards = gerar_html_cards(
-                grouped_data=agrupados,
-                sprint_title=iteration_path,
-                periodo=f"{inicio_sprint.strftime('%d/%m/%Y')} a {fim_sprint.strftime('%d/%m/%Y')}",
-                dias_uteis=dias_uteis
-            )
-            html_cards += gerar_html_userstories_card(user_stories)
-            html_cards += gerar_html_tasks_done_card(work_items)
-            html_cards += gerar_html_sustentacao_card(agrupados)
-            html_cards += gerar_html_bugs_card(work_items)
-
-            st.download_button(
-                label="📥 Baixar HTML para salvar como PDF",
-                data=html_cards,
-                file_name=f"Relatorio_Sprint_{iteration_path.replace('\\', '_')}.html",
-                mime="text/html"
-            )
+                html_cards = gerar_html_relatorio(iteration_path, inicio_sprint, fim_sprint, agrupados, user_stories, work_items)
+
+                nome_sprint = iteration_path.replace('\\', '_')
+                st.download_button(
+                    label="📥 Baixar HTML para salvar como PDF",
+                    data=html_cards,
+                    file_name=f"Relatorio_Sprint_{nome_sprint}.html",
+                    mime="text/html"
+                )
+
+                st.markdown("## 📦 Exportar Dados (Parquet)")
+                # Gerados uma vez por versão da sprint, não a cada rerun
+                exportacoes = carregar_exportacoes(sprint)
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.download_button(
+                        label="📥 Work items da sprint",
+                        data=exportacoes["work_items"],
+                        file_name=f"work_items_{nome_sprint}.parquet",
+                        mime="application/vnd.apache.parquet"
+                    )
+                with col2:
+                    st.download_button(
+                        label="📥 Agregados por desenvolvedor",
+                        data=exportacoes["agregados_dev"],
+                        file_name=f"agregados_dev_{nome_sprint}.parquet",
+                        mime="application/vnd.apache.parquet"
+                    )
         except Exception as e:
             st.error(f"Erro ao buscar dados: {e}")
             return
+        finally:
+            perfil.exibir("perfil_sprint")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,515 @@
+import base64
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote, urlencode
+
+import ijson
+import requests
+from dotenv import load_dotenv
+
+from gravacoes import GravacaoAusente, ResponseRecorder
+from work_item import WorkItem
+
+load_dotenv()
+
+
+def _carregar_times(caminho):
+    """Times do portfólio: [{"nome", "project", "team", "organization"?, "dev_count"?}, ...]"""
+    if caminho and os.path.exists(caminho):
+        with open(caminho, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    return []
+
+
+AZURE_CONFIG = {
+    "ORGANIZATION": "iaratech",
+    # Endereço da API (trocado pelo mock local no teste de carga)
+    "BASE_URL": os.getenv("SPRINTREVIEW_API_URL", "https://dev.azure.com"),
+    "PROJECT": "Iara",
+    "PAT": os.getenv("AZURE_PAT"),
+    "WORKING_HOURS_PER_DAY": 7,
+    "DEFAULT_DEV_COUNT": 5,
+    # Tempo (s) que os dados de uma sprint ficam em cache para todas as páginas
+    "SPRINT_CACHE_TTL": 300,
+    # Memória máxima das sprints em cache; as menos usadas vão para DATA_DIR/snapshots
+    "SPRINT_CACHE_MB": int(os.getenv("SPRINTREVIEW_SPRINT_CACHE_MB", "256")),
+    # Respostas idênticas concluídas há menos de N segundos são reaproveitadas
+    "REQUEST_CACHE_TTL": 30,
+    # Diretório dos dados locais (histórico de revisões etc.)
+    "DATA_DIR": os.getenv("SPRINTREVIEW_DATA_DIR", ".sprintreview"),
+    # live: só rede | record: rede + grava (e usa a gravação se a rede falhar) | replay: só gravações
+    "API_MODE": os.getenv("SPRINTREVIEW_API_MODE", "live"),
+    "REQUEST_TIMEOUT": 30,
+    # Novas tentativas de uma requisição recusada com 429 (respeitando o Retry-After)
+    "RATE_LIMIT_RETRIES": 5,
+    # Consultas WIQL particionadas e blocos do workitemsbatch em voo ao mesmo tempo
+    "API_PARALLELISM": 8,
+    # Arquivo JSON com os projetos/times da visão de portfólio (ver times.example.json)
+    "TEAMS": _carregar_times(os.getenv("SPRINTREVIEW_TEAMS", "times.json")),
+    # Porta do receptor de service hooks (desligado se vazio), interface e segredo da autenticação básica
+    "WEBHOOK_PORT": int(os.getenv("SPRINTREVIEW_WEBHOOK_PORT") or 0) or None,
+    "WEBHOOK_HOST": os.getenv("SPRINTREVIEW_WEBHOOK_HOST", "127.0.0.1"),
+    "WEBHOOK_SECRET": os.getenv("SPRINTREVIEW_WEBHOOK_SECRET"),
+    # Intervalo (s) em que os dashboards abertos conferem se a sprint mudou
+    "WEBHOOK_REFRESH": 5,
+    # Respostas GET guardadas com ETag/Last-Modified para revalidação (304)
+    "CONDITIONAL_CACHE_ENTRIES": 256,
+    # Sprints anteriores usadas como histórico de throughput na previsão de entrega
+    "FORECAST_HISTORY": 6
+}
+
+# Máximo de resultados de uma consulta WIQL e de IDs por chamada do workitemsbatch
+WIQL_LIMITE = 20000
+TAMANHO_BATCH = 200
+
+
+class SingleFlight:
+    """Agrupa chamadas idênticas em andamento numa única execução compartilhada"""
+
+    class _Chamada:
+        __slots__ = ("evento", "resultado", "erro", "concluida_em")
+
+        def __init__(self):
+            self.evento = threading.Event()
+            self.resultado = None
+            self.erro = None
+            self.concluida_em = None
+
+    def __init__(self, ttl=0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._chamadas = {}
+        # Chamadas concluídas na ordem em que terminaram; com TTL fixo, é também a ordem de expiração
+        self._concluidas = deque()
+
+    def _expirar(self, agora):
+        """Descarta os resultados vencidos (chamar com o lock); sem isso, cada chave distinta ficaria para sempre"""
+        while self._concluidas and agora - self._concluidas[0][0] >= self.ttl:
+            _, chave, chamada = self._concluidas.popleft()
+            if self._chamadas.get(chave) is chamada:
+                del self._chamadas[chave]
+
+    def do(self, chave, fn):
+        with self._lock:
+            self._expirar(time.monotonic())
+            chamada = self._chamadas.get(chave)
+            if chamada is not None and chamada.concluida_em is not None:
+                return chamada.resultado
+            lider = chamada is None
+            if lider:
+                chamada = self._Chamada()
+                self._chamadas[chave] = chamada
+
+        if not lider:
+            chamada.evento.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = fn()
+        except BaseException as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock:
+                # Erros nunca ficam em cache; sucessos ficam pelo TTL configurado
+                if chamada.erro is not None or not self.ttl:
+                    self._chamadas.pop(chave, None)
+                else:
+                    chamada.concluida_em = time.monotonic()
+                    self._concluidas.append((chamada.concluida_em, chave, chamada))
+                    self._expirar(chamada.concluida_em)
+            chamada.evento.set()
+        return chamada.resultado
+
+    def limpar(self):
+        with self._lock:
+            self._chamadas = {k: c for k, c in self._chamadas.items() if c.concluida_em is None}
+            self._concluidas.clear()
+
+
+class RateLimitState:
+    """Último sinal de limite de taxa do Azure DevOps, compartilhado por todas as threads
+
+    O Azure DevOps atrasa as requisições (X-RateLimit-Delay) e informa o consumo
+    (X-RateLimit-Remaining/Limit) antes de recusar com 429 + Retry-After.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.restante = None
+        self.limite = None
+        self.atraso = 0.0
+        self.recusas = 0
+        self._pausa_ate = 0.0
+
+    def registrar(self, response):
+        headers = response.headers
+        with self._lock:
+            # Os cabeçalhos só vêm perto do limite; sem eles não há pressão
+            self.restante = float(headers["X-RateLimit-Remaining"]) if "X-RateLimit-Remaining" in headers else None
+            self.limite = float(headers.get("X-RateLimit-Limit") or 0) or None
+            self.atraso = float(headers.get("X-RateLimit-Delay") or 0)
+            if response.status_code == 429 or "Retry-After" in headers:
+                self.recusas += response.status_code == 429
+                espera = float(headers.get("Retry-After") or 1)
+                self._pausa_ate = max(self._pausa_ate, time.monotonic() + espera)
+
+    def aguardar(self):
+        """Bloqueia enquanto houver um Retry-After pendente"""
+        espera = self._pausa_ate - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+
+    def sob_pressao(self):
+        """Sinal para reduzir a concorrência: atraso, pausa pendente ou menos de 20% da cota"""
+        with self._lock:
+            quase_no_limite = self.limite and self.restante is not None and self.restante < 0.2 * self.limite
+            return bool(self.atraso or quase_no_limite or self._pausa_ate > time.monotonic())
+
+
+class LimiteConcorrencia:
+    """Semáforo com limite ajustável: no máximo `limite` requisições HTTP em voo
+
+    Diferente do threading.Semaphore, o limite pode cair com requisições em
+    andamento; as que já entraram terminam e as novas esperam abrir vaga.
+    """
+
+    def __init__(self, limite=1):
+        self._condicao = threading.Condition()
+        self.limite = limite
+        self.em_voo = 0
+
+    def ajustar(self, limite):
+        with self._condicao:
+            self.limite = max(1, limite)
+            self._condicao.notify_all()
+
+    def __enter__(self):
+        with self._condicao:
+            self._condicao.wait_for(lambda: self.em_voo < self.limite)
+            self.em_voo += 1
+        return self
+
+    def __exit__(self, *erro):
+        with self._condicao:
+            self.em_voo -= 1
+            self._condicao.notify()
+
+
+class ConditionalCache:
+    """Corpo e validadores (ETag / Last-Modified) das últimas respostas GET
+
+    Com os validadores, a próxima chamada vira um GET condicional: se nada mudou o
+    servidor responde 304 sem corpo e o conteúdo guardado é reaproveitado.
+    """
+
+    def __init__(self, max_entradas):
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self.revalidadas = 0
+
+    def consultar(self, chave):
+        """(cabeçalhos condicionais, corpo guardado) da chave; vazio se não há validadores"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return {}, None
+            self._entradas.move_to_end(chave)
+        etag, modificado_em, conteudo = entrada
+        cabecalhos = {}
+        if etag:
+            cabecalhos["If-None-Match"] = etag
+        if modificado_em:
+            cabecalhos["If-Modified-Since"] = modificado_em
+        return cabecalhos, conteudo
+
+    def guardar(self, chave, response):
+        etag = response.headers.get("ETag")
+        modificado_em = response.headers.get("Last-Modified")
+        if not (etag or modificado_em):
+            return
+        with self._lock:
+            self._entradas[chave] = (etag, modificado_em, response.content)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def registrar_revalidacao(self):
+        with self._lock:
+            self.revalidadas += 1
+
+
+# Estado compartilhado por todas as sessões do processo Streamlit
+_session = requests.Session()
+_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32))
+_single_flight = SingleFlight(ttl=AZURE_CONFIG["REQUEST_CACHE_TTL"])
+_gravacoes = (ResponseRecorder(os.path.join(AZURE_CONFIG["DATA_DIR"], "gravacoes"))
+              if AZURE_CONFIG["API_MODE"] in ("record", "replay") else None)
+limite_taxa = RateLimitState()
+_condicional = ConditionalCache(AZURE_CONFIG["CONDITIONAL_CACHE_ENTRIES"])
+_executor = ThreadPoolExecutor(max_workers=AZURE_CONFIG["API_PARALLELISM"], thread_name_prefix="azure-api")
+
+
+class _LimiteWiql(Exception):
+    """A consulta WIQL passou do limite de resultados e precisa ser particionada"""
+
+
+def _lista_wiql(valores):
+    return ", ".join(f"'{valor}'" for valor in valores)
+
+
+def _falha_recuperavel(erro):
+    """Falhas em que vale mais mostrar a última resposta gravada do que um erro"""
+    if isinstance(erro, (requests.ConnectionError, requests.Timeout)):
+        return True
+    status = getattr(erro.response, "status_code", None) if isinstance(erro, requests.HTTPError) else None
+    return status in (401, 403) or (status is not None and status >= 500)
+
+
+# Azure DevOps API Utilities
+class AzureDevOpsAPI:
+    def __init__(self, equipe=None, limite=None):
+        """`equipe` é uma entrada de AZURE_CONFIG["TEAMS"]; sem ela, o time padrão do projeto
+
+        `limite` (LimiteConcorrencia) restringe as requisições HTTP em voo desta instância.
+        """
+        equipe = equipe or {}
+        self.organization = equipe.get("organization") or AZURE_CONFIG["ORGANIZATION"]
+        self.project = equipe.get("project") or AZURE_CONFIG["PROJECT"]
+        self.team = equipe.get("team")
+        self.url_projeto = f"{AZURE_CONFIG['BASE_URL']}/{quote(self.organization)}/{quote(self.project)}"
+        # As rotas de teamsettings sem o segmento do time usam o time padrão do projeto
+        self.url_time = f"{self.url_projeto}/{quote(self.team)}" if self.team else self.url_projeto
+        self._filtro_area = None
+        self.limite = limite
+        self.headers = self._create_headers()
+
+    def _create_headers(self):
+        encoded_pat = base64.b64encode(f":{AZURE_CONFIG['PAT']}".encode()).decode()
+        return {
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Authorization": f"Basic {encoded_pat}"
+        }
+
+    def _request(self, method, url, body=None, guardar=True):
+        """Executa a chamada via single-flight e devolve o JSON já decodificado"""
+        # Cada chamador decodifica sua própria cópia, então mutações não vazam entre sessões
+        return json.loads(self._request_bruto(method, url, body, guardar))
+
+    def _iter_json(self, method, url, body, prefixo):
+        """Decodifica só os elementos em `prefixo` (sintaxe do ijson), um de cada vez
+
+        A resposta nunca vira uma árvore de objetos Python inteira: cada elemento é
+        montado, entregue e descartado antes do próximo.
+        """
+        return ijson.items(self._request_bruto(method, url, body), prefixo, use_float=True)
+
+    def _request_bruto(self, method, url, body=None, guardar=True):
+        """Executa a chamada via single-flight e devolve o corpo da resposta em bytes
+
+        Com `guardar=False` a resposta não fica no cache de TTL nem no de ETag: serve
+        para respostas lidas uma vez só, como as páginas de uma carga incremental.
+        """
+        corpo = json.dumps(body, sort_keys=True, separators=(",", ":")) if body is not None else ""
+        credencial = hashlib.sha256(self.headers["Authorization"].encode()).hexdigest()
+        chave = (method, url, corpo, credencial)
+
+        def executar():
+            if AZURE_CONFIG["API_MODE"] == "replay":
+                return _gravacoes.reproduzir(method, url, corpo)
+            chave_condicional = (url, credencial) if method == "GET" and guardar else None
+            condicionais, guardado = _condicional.consultar(chave_condicional) if chave_condicional else ({}, None)
+            headers = {**self.headers, **condicionais}
+            try:
+                with self.limite or contextlib.nullcontext():
+                    for _ in range(AZURE_CONFIG["RATE_LIMIT_RETRIES"] + 1):
+                        limite_taxa.aguardar()
+                        response = _session.request(method, url, headers=headers, data=corpo or None,
+                                                    timeout=AZURE_CONFIG["REQUEST_TIMEOUT"])
+                        limite_taxa.registrar(response)
+                        if response.status_code != 429:
+                            break
+                response.raise_for_status()
+                if response.status_code == 304:
+                    _condicional.registrar_revalidacao()
+                    return guardado
+            except requests.RequestException as e:
+                if _gravacoes is None or not _falha_recuperavel(e):
+                    raise
+                try:
+                    return _gravacoes.reproduzir(method, url, corpo)
+                except GravacaoAusente:
+                    raise e from None
+            if chave_condicional:
+                _condicional.guardar(chave_condicional, response)
+            if _gravacoes is not None:
+                _gravacoes.gravar(method, url, corpo, response.content)
+            return response.content
+
+        if not guardar:
+            return executar()
+        return _single_flight.do(chave, executar)
+
+    def get_all_iterations(self):
+        url = f"{self.url_time}/_apis/work/teamsettings/iterations?api-version=6.0"
+        return self._request("GET", url).get("value", [])
+
+    def get_current_iteration(self):
+        url = f"{self.url_time}/_apis/work/teamsettings/iterations?$timeframe=current&api-version=6.0"
+        data = self._request("GET", url)
+
+        if not data['value']:
+            raise Exception("Nenhuma sprint atual encontrada.")
+
+        sprint = data['value'][0]
+        start = datetime.strptime(sprint['attributes']['startDate'], '%Y-%m-%dT%H:%M:%SZ')
+        end = datetime.strptime(sprint['attributes']['finishDate'], '%Y-%m-%dT%H:%M:%SZ')
+        return sprint['path'], start, end
+
+    def get_capacidades(self, iteration_id):
+        """Horas por dia (por atividade) e folgas de cada membro do time na iteração"""
+        url = f"{self.url_time}/_apis/work/teamsettings/iterations/{iteration_id}/capacities?api-version=6.0"
+        data = self._request("GET", url)
+        # A 6.0 devolve a lista em value; versões mais novas da API em teamMembers
+        return data.get("teamMembers", data.get("value", []))
+
+    def get_dias_folga_time(self, iteration_id):
+        url = f"{self.url_time}/_apis/work/teamsettings/iterations/{iteration_id}/teamdaysoff?api-version=6.0"
+        return self._request("GET", url).get("daysOff", [])
+
+    def _wiql_ids(self, condicoes, top=None, decrescente=False):
+        """IDs de uma consulta WIQL simples; sinaliza quando a resposta bate no limite"""
+        params = {"api-version": "6.0"}
+        if top:
+            params["$top"] = top
+        query = f"SELECT [System.Id] FROM WorkItems WHERE {condicoes} ORDER BY [System.Id]{' DESC' if decrescente else ''}"
+        try:
+            ids = list(self._iter_json(
+                "POST",
+                f"{self.url_projeto}/_apis/wit/wiql?{urlencode(params)}",
+                {"query": query},
+                "workItems.item.id"))
+        except requests.HTTPError as e:
+            if "VS402337" in getattr(e.response, "text", ""):
+                raise _LimiteWiql() from None
+            raise
+        # A API pode truncar em silêncio: uma resposta cheia não prova que era tudo
+        if not top and len(ids) >= WIQL_LIMITE:
+            raise _LimiteWiql()
+        return ids
+
+    def iter_wiql_ids(self, condicoes):
+        """Gera os IDs de uma consulta WIQL em lotes, sem o limite de 20 mil resultados
+
+        Tenta a consulta inteira; se ela estourar o limite, divide em faixas de
+        System.Id executadas em paralelo e subdivide ao meio as faixas que ainda
+        estourarem. As faixas são disjuntas e os IDs saem em ordem crescente.
+        """
+        try:
+            yield self._wiql_ids(condicoes)
+            return
+        except _LimiteWiql:
+            pass
+
+        maior = self._wiql_ids(condicoes, top=1, decrescente=True)[0]
+        passo = -(-maior // AZURE_CONFIG["API_PARALLELISM"])
+        faixas = [(inicio, min(inicio + passo, maior)) for inicio in range(0, maior, passo)]
+
+        def consultar(faixa):
+            return self._wiql_ids(f"({condicoes}) AND [System.Id] > {faixa[0]} AND [System.Id] <= {faixa[1]}")
+
+        # As faixas rodam em paralelo, mas saem na ordem de System.Id: assim os blocos do
+        # workitemsbatch não dependem de qual faixa terminou primeiro (gravações, single-flight)
+        pendentes = deque((faixa, _executor.submit(consultar, faixa)) for faixa in faixas)
+        while pendentes:
+            (inicio, fim), future = pendentes.popleft()
+            try:
+                ids = future.result()
+            except _LimiteWiql:
+                meio = (inicio + fim) // 2
+                metades = [(faixa, _executor.submit(consultar, faixa)) for faixa in ((inicio, meio), (meio, fim))]
+                pendentes.extendleft(reversed(metades))
+                continue
+            if ids:
+                yield ids
+
+    def filtro_area_time(self):
+        """Condição WIQL com as áreas do time (vazia para o time padrão do projeto)"""
+        if self.team and self._filtro_area is None:
+            data = self._request("GET", f"{self.url_time}/_apis/work/teamsettings/teamfieldvalues?api-version=6.0")
+            campo = data.get("field", {}).get("referenceName", "System.AreaPath")
+            condicoes = [
+                f"[{campo}] {'UNDER' if valor.get('includeChildren') else '='} '{valor['value']}'"
+                for valor in data.get("values", [])
+            ]
+            self._filtro_area = f" AND ({' OR '.join(condicoes)})" if condicoes else ""
+        return self._filtro_area or ""
+
+    def iter_work_item_ids(self, iteration_path, tipos=("User Story", "Task", "Bug"), estados=None):
+        """IDs dos itens dos `tipos` da iteração (e das áreas do time), em lotes; `estados` restringe o estado"""
+        filtro_estado = f" AND [System.State] IN ({_lista_wiql(estados)})" if estados else ""
+        return self.iter_wiql_ids(
+            f"[System.TeamProject] = '{self.project}'"
+            f" AND [System.IterationPath] = '{iteration_path}'"
+            f" AND [System.WorkItemType] IN ({_lista_wiql(tipos)})"
+            f"{filtro_estado}{self.filtro_area_time()}")
+
+    def iter_work_items_batch(self, lotes_ids, fields):
+        """Consome lotes de IDs à medida que chegam e gera WorkItem na ordem recebida
+
+        Os IDs são reagrupados em blocos de 200 (limite do workitemsbatch) e até
+        API_PARALLELISM blocos ficam em voo ao mesmo tempo.
+        """
+        url = f"{self.url_projeto}/_apis/wit/workitemsbatch?api-version=6.0"
+
+        def buscar(bloco):
+            # Cada item do JSON vira WorkItem assim que é decodificado
+            return [WorkItem.from_json(item) for item in
+                    self._iter_json("POST", url, {"ids": bloco, "fields": fields}, "value.item")]
+
+        em_voo = deque()
+        bloco = []
+        for lote in lotes_ids:
+            for item_id in lote:
+                bloco.append(item_id)
+                if len(bloco) == TAMANHO_BATCH:
+                    em_voo.append(_executor.submit(buscar, bloco))
+                    bloco = []
+            while len(em_voo) >= AZURE_CONFIG["API_PARALLELISM"]:
+                yield from em_voo.popleft().result()
+        if bloco:
+            em_voo.append(_executor.submit(buscar, bloco))
+        while em_voo:
+            yield from em_voo.popleft().result()
+
+    def iter_work_item_revisions(self, continuation_token=None, fields=None):
+        """Percorre a API de reporting de revisões página a página
+
+        Gera (revisões, continuation_token, é_última_página); o token da última página é a
+        marca d'água para buscar só as revisões novas numa próxima execução.
+        """
+        url = f"{self.url_projeto}/_apis/wit/reporting/workitemrevisions"
+        while True:
+            params = {"includeIdentityRef": "true", "maxPageSize": 1000, "api-version": "6.0"}
+            if fields:
+                params["fields"] = ",".join(fields)
+            if continuation_token:
+                params["continuationToken"] = continuation_token
+            # Cada página é lida uma vez só; guardá-la no cache só prenderia memória
+            data = self._request("GET", f"{url}?{urlencode(params)}", guardar=False)
+            continuation_token = data.get("continuationToken", continuation_token)
+            ultima = data.get("isLastBatch", True)
+            yield data.get("values", []), continuation_token, ultima
+            if ultima:
+                return
@@ -0,0 +1,147 @@
+# Carga histórica de todas as sprints com concorrência adaptativa e checkpoint em disco
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from azure_devops import AZURE_CONFIG, AzureDevOpsAPI, LimiteConcorrencia, limite_taxa
+from busca import SearchIndex
+from dados_sprint import baixar_iteracoes, baixar_itens_busca
+
+MAX_TENTATIVAS = 3
+
+
+class BackfillScheduler:
+    """Fila de jobs por sprint executada com concorrência ajustada ao limite de taxa
+
+    A concorrência sobe de um em um enquanto a API responde sem pressão e cai pela
+    metade quando o Azure DevOps sinaliza atraso, cota baixa ou 429. Ela limita as
+    requisições HTTP em voo (cada sprint dispara várias em paralelo), não só as
+    sprints. Cada sprint concluída vai para o checkpoint, então uma carga
+    interrompida recomeça do ponto em que parou.
+    """
+
+    def __init__(self, caminho_checkpoint=None, max_concorrencia=4, api=None, indice=None):
+        self.caminho_checkpoint = caminho_checkpoint or os.path.join(AZURE_CONFIG["DATA_DIR"], "backfill.json")
+        self.max_concorrencia = max_concorrencia
+        self.concorrencia = 1
+        self.limite = LimiteConcorrencia(self.concorrencia)
+        self.api = api or AzureDevOpsAPI(limite=self.limite)
+        self.indice = indice or SearchIndex()
+        self.checkpoint = self._ler_checkpoint()
+
+    def _ler_checkpoint(self):
+        try:
+            with open(self.caminho_checkpoint, encoding="utf-8") as arquivo:
+                return json.load(arquivo)
+        except FileNotFoundError:
+            return {"concluidas": {}, "falhas": {}}
+
+    def _gravar_checkpoint(self):
+        diretorio = os.path.dirname(self.caminho_checkpoint) or "."
+        os.makedirs(diretorio, exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=diretorio)
+        with os.fdopen(fd, "w", encoding="utf-8") as arquivo:
+            json.dump(self.checkpoint, arquivo, ensure_ascii=False)
+        os.replace(temporario, self.caminho_checkpoint)
+
+    def pendentes(self, iteracoes):
+        return [it["path"] for it in iteracoes if it["path"] not in self.checkpoint["concluidas"]]
+
+    def _executar_job(self, path):
+        work_items = baixar_itens_busca(path, self.api)
+        self.indice.indexar_sprint(path, work_items)
+        return len(work_items)
+
+    def _ajustar_concorrencia(self):
+        if limite_taxa.sob_pressao():
+            self.concorrencia = max(1, self.concorrencia // 2)
+        elif self.concorrencia < self.max_concorrencia:
+            self.concorrencia += 1
+        self.limite.ajustar(self.concorrencia)
+
+    def executar(self, iteracoes, progresso=None):
+        """Baixa e indexa as sprints pendentes; retorna {"concluidas": n, "falhas": n}
+
+        `progresso(feitas, total, eta_segundos, concorrencia)` é chamado na thread de
+        quem executa, após cada sprint.
+        """
+        fila = self.pendentes(iteracoes)
+        total = len(fila)
+        tentativas = {}
+        feitas = falhas = 0
+        inicio = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_concorrencia) as executor:
+            em_andamento = {}
+            while fila or em_andamento:
+                while fila and len(em_andamento) < self.concorrencia:
+                    path = fila.pop(0)
+                    em_andamento[executor.submit(self._executar_job, path)] = path
+
+                concluidos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+                for future in concluidos:
+                    path = em_andamento.pop(future)
+                    try:
+                        itens = future.result()
+                    except Exception as e:
+                        tentativas[path] = tentativas.get(path, 0) + 1
+                        if tentativas[path] < MAX_TENTATIVAS:
+                            fila.append(path)
+                            continue
+                        self.checkpoint["falhas"][path] = str(e)
+                        falhas += 1
+                    else:
+                        self.checkpoint["concluidas"][path] = {"itens": itens, "em": int(time.time())}
+                        self.checkpoint["falhas"].pop(path, None)
+                        feitas += 1
+                    self._gravar_checkpoint()
+
+                self._ajustar_concorrencia()
+                if progresso:
+                    processadas = feitas + falhas
+                    decorrido = time.monotonic() - inicio
+                    eta = decorrido / processadas * (total - processadas) if processadas else None
+                    progresso(processadas, total, eta, self.concorrencia)
+
+        return {"concluidas": feitas, "falhas": falhas}
+
+
+def formatar_eta(segundos):
+    if segundos is None:
+        return "--:--"
+    minutos, segundos = divmod(int(segundos), 60)
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas:d}:{minutos:02d}:{segundos:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carrega o histórico de sprints respeitando o limite de taxa da API")
+    parser.add_argument("--desde", help="Só iterações iniciadas a partir desta data (AAAA-MM-DD)")
+    parser.add_argument("--concorrencia", type=int, default=4, help="Máximo de requisições à API em paralelo")
+    parser.add_argument("--checkpoint", help="Arquivo de checkpoint (padrão: DATA_DIR/backfill.json)")
+    parser.add_argument("--reiniciar", action="store_true", help="Ignora o checkpoint e baixa tudo de novo")
+    args = parser.parse_args()
+
+    scheduler = BackfillScheduler(args.checkpoint, args.concorrencia)
+    if args.reiniciar:
+        scheduler.checkpoint = {"concluidas": {}, "falhas": {}}
+
+    iteracoes, _ = baixar_iteracoes(scheduler.api)
+    if args.desde:
+        iteracoes = [it for it in iteracoes if it["attributes"]["startDate"] >= args.desde]
+
+    print(f"{len(scheduler.pendentes(iteracoes))} de {len(iteracoes)} sprints pendentes.", flush=True)
+    resultado = scheduler.executar(
+        iteracoes,
+        progresso=lambda feitas, total, eta, concorrencia: print(
+            f"{feitas}/{total} sprints | ETA {formatar_eta(eta)} | concorrência {concorrencia}", flush=True)
+    )
+    print(f"✅ {resultado['concluidas']} sprints carregadas, {resultado['falhas']} com falha "
+          f"(serão tentadas de novo na próxima execução).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# Índice de busca textual (SQLite FTS5) dos work items de todas as sprints sincronizadas
+import os
+import re
+import sqlite3
+import threading
+
+from azure_devops import AZURE_CONFIG
+
+# Tabela comum com o conteúdo e índice FTS5 externo mantido por triggers: cada
+# INSERT/UPDATE/DELETE em itens reindexa só a linha alterada
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS itens (
+    id INTEGER PRIMARY KEY, sprint TEXT NOT NULL, title TEXT, tags TEXT,
+    dev TEXT, state TEXT, tipo TEXT
+);
+CREATE INDEX IF NOT EXISTS itens_sprint ON itens (sprint);
+CREATE VIRTUAL TABLE IF NOT EXISTS itens_fts USING fts5(
+    title, tags, dev, state, tipo, sprint,
+    content='itens', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS itens_ai AFTER INSERT ON itens BEGIN
+    INSERT INTO itens_fts (rowid, title, tags, dev, state, tipo, sprint)
+    VALUES (new.id, new.title, new.tags, new.dev, new.state, new.tipo, new.sprint);
+END;
+CREATE TRIGGER IF NOT EXISTS itens_ad AFTER DELETE ON itens BEGIN
+    INSERT INTO itens_fts (itens_fts, rowid, title, tags, dev, state, tipo, sprint)
+    VALUES ('delete', old.id, old.title, old.tags, old.dev, old.state, old.tipo, old.sprint);
+END;
+CREATE TRIGGER IF NOT EXISTS itens_au AFTER UPDATE ON itens BEGIN
+    INSERT INTO itens_fts (itens_fts, rowid, title, tags, dev, state, tipo, sprint)
+    VALUES ('delete', old.id, old.title, old.tags, old.dev, old.state, old.tipo, old.sprint);
+    INSERT INTO itens_fts (rowid, title, tags, dev, state, tipo, sprint)
+    VALUES (new.id, new.title, new.tags, new.dev, new.state, new.tipo, new.sprint);
+END;
+"""
+
+# Peso de cada coluna no bm25 (mesma ordem do fts5): título vale mais que tags, dev etc.
+PESOS_BM25 = (10.0, 5.0, 2.0, 1.0, 1.0, 0.5)
+
+COLUNAS = ("sprint", "title", "tags", "dev", "state", "tipo")
+
+# Upsert em vez de INSERT OR REPLACE: o REPLACE apaga a linha sem disparar o trigger
+# de DELETE e deixaria o índice FTS dessincronizado
+UPSERT = f"""
+INSERT INTO itens (id, {', '.join(COLUNAS)}) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET {', '.join(f'{coluna} = excluded.{coluna}' for coluna in COLUNAS)}
+"""
+
+
+def _linha(sprint_path, wi):
+    return (sprint_path, wi.title, wi.tags or "", wi.dev, wi.state, wi.tipo)
+
+
+def montar_consulta(texto):
+    """Converte o texto digitado numa consulta FTS5 segura (todos os termos, por prefixo)
+
+    Colchetes, aspas e operadores são tratados como separadores, então
+    "[sustentação] login" vira "sustentação"* "login"*.
+    """
+    termos = re.findall(r"\w+", texto)
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+
+class SearchIndex:
+    """Busca por título, tags, dev, estado e tipo em todas as sprints já carregadas"""
+
+    def __init__(self, caminho=None):
+        caminho = caminho or os.path.join(AZURE_CONFIG["DATA_DIR"], "busca.sqlite")
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def indexar_sprint(self, sprint_path, work_items):
+        """Sincroniza o índice com os itens atuais da sprint; retorna quantas linhas mudaram
+
+        Só itens novos ou alterados são regravados, e itens que saíram da sprint são
+        removidos do índice (a não ser que já tenham sido indexados em outra sprint).
+        """
+        with self._lock, self.conn:
+            atuais = {
+                row[0]: row[1:] for row in self.conn.execute(
+                    f"SELECT id, {', '.join(COLUNAS)} FROM itens WHERE sprint = ?", (sprint_path,))
+            }
+            alterados = [
+                (wi.id,) + _linha(sprint_path, wi) for wi in work_items
+                if atuais.get(wi.id) != _linha(sprint_path, wi)
+            ]
+            self.conn.executemany(UPSERT, alterados)
+
+            ids = {wi.id for wi in work_items}
+            removidos = [(item_id, sprint_path) for item_id in atuais if item_id not in ids]
+            self.conn.executemany("DELETE FROM itens WHERE id = ? AND sprint = ?", removidos)
+        return len(alterados) + len(removidos)
+
+    def indexar_itens(self, sprint_path, work_items):
+        """Grava itens avulsos sem comparar com a sprint inteira (ex.: notificações de alteração)"""
+        with self._lock, self.conn:
+            self.conn.executemany(UPSERT, [(wi.id,) + _linha(sprint_path, wi) for wi in work_items])
+
+    def remover_item(self, item_id):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM itens WHERE id = ?", (item_id,))
+
+    def buscar(self, texto, limite=50, sprint=None):
+        """Itens mais relevantes (bm25) para o texto"""
+        consulta = montar_consulta(texto)
+        if not consulta:
+            return []
+        filtro_sprint = "AND i.sprint = ?" if sprint else ""
+        parametros = [consulta] + ([sprint] if sprint else []) + [limite]
+        with self._lock:
+            rows = self.conn.execute(
+                f"""
+                SELECT i.id, i.sprint, i.tipo, i.state, i.dev, i.tags, i.title,
+                       bm25(itens_fts, {', '.join(map(str, PESOS_BM25))}) AS score
+                FROM itens_fts JOIN itens i ON i.id = itens_fts.rowid
+                WHERE itens_fts MATCH ? {filtro_sprint}
+                ORDER BY score LIMIT ?
+                """, parametros).fetchall()
+            # Um ID digitado direto também encontra o próprio item, além das menções no título
+            if texto.strip().isdigit() and all(row[0] != int(texto) for row in rows):
+                exato = self.conn.execute(
+                    f"SELECT id, sprint, tipo, state, dev, tags, title, -1e9 FROM itens i WHERE id = ? {filtro_sprint}",
+                    [int(texto)] + ([sprint] if sprint else [])).fetchone()
+                if exato:
+                    rows.insert(0, exato)
+
+        campos = ("id", "sprint", "tipo", "state", "dev", "tags", "title", "score")
+        return [dict(zip(campos, row)) for row in rows]
+
+    def estatisticas(self):
+        with self._lock:
+            itens, sprints = self.conn.execute("SELECT COUNT(*), COUNT(DISTINCT sprint) FROM itens").fetchone()
+        return {"itens": itens, "sprints": sprints}
@@ -0,0 +1,338 @@
+# Cache das sprints carregadas, compartilhado pelo processo, com orçamento de memória e despejo em disco
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from datetime import datetime
+
+import pyarrow.compute as pc
+
+from agregados import SprintAggregates
+from azure_devops import SingleFlight
+from exportacao import SCHEMA_WORK_ITEMS, Escritor, ler_exportacao, lotes_work_items
+from work_item import WorkItem
+
+# Custo fixo de cada WorkItem em memória: o objeto, as strings vazias de título/tags e a referência na lista
+_BYTES_POR_ITEM = sys.getsizeof(WorkItem(0)) + 2 * sys.getsizeof("") + 16
+
+
+class ItensSnapshot(Sequence):
+    """Work items de um snapshot relido: as colunas ficam no memory-map do Arrow IPC
+
+    Os WorkItem só são montados no primeiro acesso item a item; as exportações leem
+    `tabela` direto, sem passar por objetos Python.
+    """
+
+    def __init__(self, tabela):
+        self.tabela = tabela
+        self._itens = None
+        self._lock = threading.Lock()
+
+    @property
+    def materializado(self):
+        return self._itens is not None
+
+    def _materializar(self):
+        with self._lock:
+            if self._itens is None:
+                colunas = [self.tabela.column(nome).to_pylist() for nome in WorkItem.__slots__]
+                self._itens = [WorkItem(*valores) for valores in zip(*colunas)]
+            return self._itens
+
+    def __len__(self):
+        return self.tabela.num_rows
+
+    def __getitem__(self, posicao):
+        return self._materializar()[posicao]
+
+    def __iter__(self):
+        return iter(self._materializar())
+
+
+def _tamanho_estimado(sprint):
+    """Bytes aproximados da sprint em memória (work items + referências nos agregados)
+
+    Tipo, estado e dev são internados e compartilhados entre as sprints; não entram na conta.
+    Itens de snapshot ainda não montados contam como se já estivessem: a primeira página monta.
+    """
+    work_items = sprint["work_items"]
+    if isinstance(work_items, ItensSnapshot) and not work_items.materializado:
+        textos = sum(pc.sum(pc.binary_length(work_items.tabela.column(nome))).as_py() or 0 for nome in ("title", "tags"))
+        itens = len(work_items) * (_BYTES_POR_ITEM + 8) + textos
+    else:
+        itens = sys.getsizeof(work_items) + sum(
+            sys.getsizeof(wi) + sys.getsizeof(wi.title) + sys.getsizeof(wi.tags) + 16 for wi in work_items)
+    agregados = sprint["agregados"]
+    # itens_por_dev guarda uma referência por item; as linhas por dev e por tipo são dicts pequenos
+    linhas = (len(agregados.por_dev) * 2 + len(agregados.por_tipo)) * sys.getsizeof({"itens": 0, "horas": 0.0})
+    return itens + 8 * len(work_items) + linhas
+
+
+class SprintCache:
+    """Sprints carregadas, com versão incrementada a cada mudança aplicada
+
+    Cada alteração gera um novo dict de sprint (cópia na escrita): quem está
+    renderizando continua com a versão anterior, sem travas na leitura.
+
+    As sprints mais recentes ficam em memória até `orcamento_bytes` (LRU), junto com os
+    valores derivados delas (tabelas, índices, exportações), que contam no orçamento e
+    saem junto. As demais são gravadas em Arrow IPC sem compressão e relidas por
+    memory-map: os agregados vêm dos metadados e os WorkItem só são montados no primeiro
+    uso. As gravações em disco acontecem fora da trava, para não segurar leituras e webhooks.
+    """
+
+    def __init__(self, ttl, orcamento_bytes=None, diretorio=None):
+        self.ttl = ttl
+        self.orcamento_bytes = orcamento_bytes
+        self.diretorio = diretorio
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._versoes = {}
+        self._carregando = SingleFlight()
+        self._derivando = SingleFlight()
+        # Snapshot em gravação de cada sprint despejada (a entrada despejada); None se invalidado no meio
+        self._gravando = {}
+        self.usado_bytes = 0
+        self.estatisticas = {"acertos": 0, "faltas": 0, "despejos": 0, "recargas": 0, "recarga_ms_total": 0.0}
+
+    def _arquivo(self, iteration_path):
+        nome = hashlib.sha256(iteration_path.encode()).hexdigest()[:32]
+        return os.path.join(self.diretorio, f"{nome}.arrow")
+
+    def _remover_snapshot(self, iteration_path):
+        try:
+            os.remove(self._arquivo(iteration_path))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # No Windows o arquivo ainda mapeado por uma versão em uso não pode ser apagado;
+            # a recarga confere a versão e descarta o snapshot velho
+            pass
+
+    def obter(self, iteration_path, carregar):
+        with self._lock:
+            entrada = self._entradas.get(iteration_path)
+            if entrada is not None and time.time() - entrada["carregada_em"] < self.ttl:
+                self._entradas.move_to_end(iteration_path)
+                self.estatisticas["acertos"] += 1
+                return entrada["sprint"]
+
+        def carregar_e_guardar():
+            recarregada = self._recarregar(iteration_path)
+            if recarregada is not None:
+                sprint, carregada_em = recarregada
+            else:
+                sprint, carregada_em = carregar(), time.time()
+            with self._lock:
+                self.estatisticas["faltas"] += 1
+                anterior = self._versoes.get(iteration_path)
+                if recarregada is None and anterior is not None:
+                    # A versão nunca volta, senão um dashboard aberto não veria a recarga
+                    sprint = {**sprint, "versao": anterior + 1}
+                sprint.setdefault("versao", 0)
+                despejadas = self._guardar(iteration_path, sprint, carregada_em)
+            self._gravar_despejadas(despejadas)
+            return sprint
+
+        return self._carregando.do(iteration_path, carregar_e_guardar)
+
+    def derivado(self, sprint, nome, construir, tamanho):
+        """Valor derivado de uma versão da sprint, montado uma vez e guardado na entrada dela
+
+        Conta no orçamento de memória e é descartado com a sprint (despejo ou nova versão).
+        Versões que já saíram do cache recebem o valor montado, sem guardá-lo.
+        """
+        path = sprint["path"]
+        with self._lock:
+            entrada = self._entradas.get(path)
+            if entrada is not None and entrada["sprint"] is sprint and nome in entrada["derivados"]:
+                return entrada["derivados"][nome]
+
+        def construir_e_guardar():
+            valor = construir()
+            despejadas = []
+            with self._lock:
+                entrada = self._entradas.get(path)
+                if entrada is not None and entrada["sprint"] is sprint and nome not in entrada["derivados"]:
+                    entrada["derivados"][nome] = valor
+                    bytes_valor = tamanho(valor)
+                    entrada["bytes"] += bytes_valor
+                    self.usado_bytes += bytes_valor
+                    self._entradas.move_to_end(path)
+                    despejadas = self._despejar()
+            self._gravar_despejadas(despejadas)
+            return valor
+
+        return self._derivando.do((path, sprint["versao"], nome), construir_e_guardar)
+
+    def _guardar(self, iteration_path, sprint, carregada_em):
+        antiga = self._entradas.pop(iteration_path, None)
+        if antiga is not None:
+            self.usado_bytes -= antiga["bytes"]
+        tamanho = _tamanho_estimado(sprint)
+        self._entradas[iteration_path] = {"sprint": sprint, "carregada_em": carregada_em, "bytes": tamanho, "derivados": {}}
+        self._versoes[iteration_path] = sprint["versao"]
+        self.usado_bytes += tamanho
+        return self._despejar()
+
+    def _despejar(self):
+        """Tira da memória as sprints menos usadas até caber no orçamento (a mais recente sempre fica)
+
+        Chamado com a trava; devolve as sprints que ainda precisam de snapshot para `_gravar_despejadas`.
+        """
+        despejadas = []
+        if not self.orcamento_bytes or not self.diretorio:
+            return despejadas
+        while self.usado_bytes > self.orcamento_bytes and len(self._entradas) > 1:
+            path, entrada = self._entradas.popitem(last=False)
+            self.usado_bytes -= entrada["bytes"]
+            self.estatisticas["despejos"] += 1
+            if time.time() - entrada["carregada_em"] >= self.ttl:
+                continue
+            # Relida de um snapshot e sem mudanças desde então: o arquivo em disco já é esta versão
+            if isinstance(entrada["sprint"]["work_items"], ItensSnapshot) and os.path.exists(self._arquivo(path)):
+                continue
+            self._gravando[path] = entrada
+            despejadas.append((path, entrada))
+        return despejadas
+
+    def _gravar_despejadas(self, despejadas):
+        """Grava os snapshots sem a trava e só os publica se ninguém mexeu na sprint no meio tempo"""
+        for path, entrada in despejadas:
+            temporario = f"{self._arquivo(path)}.{id(entrada):x}.tmp"
+            try:
+                self._gravar_snapshot(temporario, path, entrada["sprint"], entrada["carregada_em"])
+                with self._lock:
+                    # Um webhook mudou a sprint, ela voltou à memória ou foi despejada de novo
+                    if self._gravando.get(path) is entrada and path not in self._entradas:
+                        try:
+                            os.replace(temporario, self._arquivo(path))
+                        except OSError:
+                            pass  # snapshot anterior ainda mapeado (Windows): a sprint será baixada de novo
+            finally:
+                with self._lock:
+                    if self._gravando.get(path) is entrada:
+                        del self._gravando[path]
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+
+    def _gravar_snapshot(self, destino, iteration_path, sprint, carregada_em):
+        os.makedirs(self.diretorio, exist_ok=True)
+        metadados = {
+            "path": iteration_path, "name": sprint["name"], "versao": sprint["versao"],
+            "inicio": sprint["inicio"].isoformat(), "fim": sprint["fim"].isoformat(),
+            "capacidade": sprint.get("capacidade"), "carregada_em": carregada_em,
+            "agregados": sprint["agregados"].para_metadados()
+        }
+        schema = SCHEMA_WORK_ITEMS.with_metadata({"sprint": json.dumps(metadados)})
+        # Sem compressão: a recarga mapeia o arquivo em memória sem copiar as colunas
+        with Escritor(destino, schema, "arrow") as escritor:
+            for lote in lotes_work_items(iteration_path, sprint["work_items"], schema):
+                escritor.escrever(lote)
+
+    def _recarregar(self, iteration_path):
+        """(sprint, carregada_em) do snapshot em disco, se existir, estiver no TTL e for a versão atual"""
+        if not self.diretorio:
+            return None
+        inicio = time.perf_counter()
+        try:
+            tabela = ler_exportacao(self._arquivo(iteration_path))
+        except FileNotFoundError:
+            return None
+        metadados = json.loads(tabela.schema.metadata[b"sprint"])
+        with self._lock:
+            versao_atual = self._versoes.get(iteration_path, metadados["versao"])
+        if (time.time() - metadados["carregada_em"] >= self.ttl or metadados["versao"] != versao_atual
+                or "agregados" not in metadados):
+            del tabela
+            self._remover_snapshot(iteration_path)
+            return None
+
+        work_items = ItensSnapshot(tabela)
+        sprint = {
+            "path": iteration_path,
+            "name": metadados["name"],
+            "inicio": datetime.fromisoformat(metadados["inicio"]),
+            "fim": datetime.fromisoformat(metadados["fim"]),
+            "work_items": work_items,
+            "agregados": SprintAggregates.de_metadados(metadados["agregados"], work_items),
+            "capacidade": metadados.get("capacidade"),
+            "versao": metadados["versao"]
+        }
+        with self._lock:
+            self.estatisticas["recargas"] += 1
+            self.estatisticas["recarga_ms_total"] += (time.perf_counter() - inicio) * 1000
+        return sprint, metadados["carregada_em"]
+
+    def versao(self, iteration_path):
+        with self._lock:
+            return self._versoes.get(iteration_path)
+
+    def aplicar(self, item_id, novo, iteracao, iteracao_anterior=None):
+        """Troca (ou remove, com novo=None) um item nas sprints em cache; retorna as sprints alteradas
+
+        Um item que mudou de iteração sai da sprint antiga e entra na nova. Snapshots em
+        disco da sprint alterada são descartados; despejadas são baixadas de novo no próximo uso.
+        """
+        alteradas = []
+        despejadas = []
+        with self._lock:
+            for path in dict.fromkeys(p for p in (iteracao_anterior, iteracao) if p):
+                entrada = self._entradas.get(path)
+                if entrada is None:
+                    # Despejada: o snapshot (gravado ou em gravação) fica velho e é descartado
+                    descartada = self._gravando.get(path) is not None
+                    if descartada:
+                        self._gravando[path] = None
+                    if self.diretorio and os.path.exists(self._arquivo(path)):
+                        self._remover_snapshot(path)
+                        descartada = True
+                    if descartada:
+                        alteradas.append(path)
+                    continue
+                sprint = entrada["sprint"]
+                work_items = list(sprint["work_items"])
+                posicao = next((i for i, wi in enumerate(work_items) if wi.id == item_id), None)
+                antigo = work_items[posicao] if posicao is not None else None
+                atual = novo if path == iteracao else None
+                if antigo is None and atual is None:
+                    continue
+
+                if atual is None:
+                    del work_items[posicao]
+                elif posicao is None:
+                    work_items.append(atual)
+                else:
+                    work_items[posicao] = atual
+                agregados = sprint["agregados"].copiar()
+                agregados.atualizar(antigo, atual)
+
+                if self.diretorio and isinstance(sprint["work_items"], ItensSnapshot):
+                    # O snapshot de onde a sprint foi relida deixa de ser a versão atual
+                    self._remover_snapshot(path)
+                despejadas += self._guardar(path, {**sprint, "work_items": work_items, "agregados": agregados,
+                                                   "versao": sprint["versao"] + 1}, entrada["carregada_em"])
+                alteradas.append(path)
+        self._gravar_despejadas(despejadas)
+        return alteradas
+
+    def resumo(self):
+        """Tamanho, orçamento e contadores do cache (para exibição)"""
+        with self._lock:
+            recargas = self.estatisticas["recargas"]
+            return {
+                "sprints_em_memoria": len(self._entradas),
+                "usado_mb": self.usado_bytes / 2**20,
+                "orcamento_mb": (self.orcamento_bytes or 0) / 2**20,
+                **{k: v for k, v in self.estatisticas.items() if k != "recarga_ms_total"},
+                "recarga_ms_media": self.estatisticas["recarga_ms_total"] / recargas if recargas else None
+            }
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.usado_bytes = 0
@@ -0,0 +1,60 @@
+# Capacidade real do time na sprint: horas/dia de cada dev, folgas individuais e do time e feriados
+import numpy as np
+
+from azure_devops import AZURE_CONFIG
+from marcacoes import FERIADOS
+
+
+def _dias(inicio, fim):
+    return np.arange(np.datetime64(inicio.date()), np.datetime64(fim.date()) + 1, dtype="datetime64[D]")
+
+
+def _feriados(dias):
+    if not len(dias):
+        return np.array([], dtype="datetime64[D]")
+    anos = range(dias[0].astype(object).year, dias[-1].astype(object).year + 1)
+    return np.array([f"{ano}-{data[3:]}-{data[:2]}" for ano in anos for data in FERIADOS], dtype="datetime64[D]")
+
+
+def _em_folga(dias, folgas):
+    """Máscara dos dias cobertos por algum período de folga ({"start", "end"} do Azure DevOps)"""
+    if not folgas:
+        return np.zeros(len(dias), dtype=bool)
+    inicios = np.array([folga["start"][:10] for folga in folgas], dtype="datetime64[D]")
+    fins = np.array([folga["end"][:10] for folga in folgas], dtype="datetime64[D]")
+    # Matriz (folgas x dias): um dia está de folga se cair em qualquer um dos períodos
+    return ((dias >= inicios[:, None]) & (dias <= fins[:, None])).any(axis=0)
+
+
+def _calendario(inicio, fim, folgas_time=()):
+    dias = _dias(inicio, fim)
+    uteis = np.is_busday(dias, holidays=_feriados(dias)) & ~_em_folga(dias, folgas_time)
+    return dias, uteis
+
+
+def dias_uteis(inicio, fim, folgas_time=()):
+    """Dias úteis do período, sem fins de semana, feriados e folgas do time"""
+    return int(_calendario(inicio, fim, folgas_time)[1].sum())
+
+
+def calcular_capacidade(inicio, fim, membros, folgas_time=()):
+    """Capacidade de cada dev na sprint a partir da capacidade cadastrada no Azure DevOps
+
+    Membros sem horas por dia cadastradas usam WORKING_HOURS_PER_DAY; as folgas
+    (do time e de cada dev) sempre descontam dias. `dias_uteis` já desconta as
+    folgas do time e vale para quem não está na lista de capacidade.
+    """
+    dias, uteis = _calendario(inicio, fim, folgas_time)
+    dias_time = int(uteis.sum())
+    devs = {}
+    for membro in membros:
+        por_dia = sum(atividade.get("capacityPerDay") or 0 for atividade in membro.get("activities", []))
+        disponiveis = int((uteis & ~_em_folga(dias, membro.get("daysOff", []))).sum())
+        por_dia = por_dia or AZURE_CONFIG["WORKING_HOURS_PER_DAY"]
+        devs[membro["teamMember"]["displayName"]] = {
+            "capacidade_dia": por_dia,
+            "dias_disponiveis": disponiveis,
+            "dias_folga": dias_time - disponiveis,
+            "horas": por_dia * disponiveis
+        }
+    return {"dias_uteis": dias_time, "devs": devs}
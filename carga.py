@@ -0,0 +1,359 @@
+# Teste de carga: N sessões simuladas do dashboard contra um mock local da API do Azure DevOps
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+from azure_devops import AZURE_CONFIG
+
+try:
+    import resource
+except ImportError:  # Windows: sem CPU/RSS do processo
+    resource = None
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+PAGINAS = ("app.py", "pages/atividades_sprint.py", "horas_extras.py")
+ESTADOS = ("To Do", "In Progress", "Code Review", "Done")
+TIMEOUT_RERUN = 120
+
+
+class MockAzureDevOps:
+    """Dados sintéticos e determinísticos no formato das rotas usadas pelo dashboard"""
+
+    def __init__(self, sprints=8, itens_por_sprint=2000, devs=8, semente=42):
+        self.itens_por_sprint = itens_por_sprint
+        self.devs = [f"Dev {i + 1}" for i in range(devs)]
+        self.semente = semente
+        # Sprints de duas semanas; a penúltima é a atual
+        hoje = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        inicio_atual = hoje - timedelta(days=hoje.weekday())
+        self.iteracoes = []
+        for n in range(sprints):
+            inicio = inicio_atual + timedelta(weeks=2 * (n - (sprints - 2)))
+            self.iteracoes.append({
+                "id": f"iteracao-{n}",
+                "name": f"Sprint {n + 1}",
+                "path": f"{AZURE_CONFIG['PROJECT']}\\Sprint {n + 1}",
+                "attributes": {
+                    "startDate": inicio.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    "finishDate": (inicio + timedelta(days=11)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    "timeFrame": "past" if n < sprints - 2 else "current" if n == sprints - 2 else "future"
+                }
+            })
+
+    def ids_da_sprint(self, path):
+        n = next((i for i, it in enumerate(self.iteracoes) if it["path"] == path), None)
+        if n is None:
+            return []
+        return list(range(n * self.itens_por_sprint + 1, (n + 1) * self.itens_por_sprint + 1))
+
+    def item(self, item_id):
+        aleatorio = random.Random(self.semente * 1_000_003 + item_id)
+        n = (item_id - 1) // self.itens_por_sprint
+        # Uma User Story a cada 10 itens; as Tasks/Bugs seguintes são filhas dela
+        if item_id % 10 == 1:
+            tipo, pai = "User Story", None
+        else:
+            tipo, pai = ("Bug" if aleatorio.random() < 0.15 else "Task"), item_id - (item_id - 1) % 10
+        prefixo = aleatorio.choice(["", "", "", "[nãoplanejada] ", "[sustentação] "])
+        fields = {
+            "System.Id": item_id,
+            "System.Title": f"{prefixo}{tipo} {item_id}",
+            "System.WorkItemType": tipo,
+            "System.State": aleatorio.choice(ESTADOS),
+            "System.AssignedTo": {"displayName": aleatorio.choice(self.devs)},
+            "System.IterationPath": self.iteracoes[n]["path"],
+            "Microsoft.VSTS.Scheduling.OriginalEstimate": float(aleatorio.randint(1, 8)),
+            "Microsoft.VSTS.Scheduling.CompletedWork": float(aleatorio.randint(0, 10))
+        }
+        if pai:
+            fields["System.Parent"] = pai
+        return {"id": item_id, "fields": fields}
+
+    def capacidades(self):
+        return [{"teamMember": {"displayName": dev}, "activities": [{"name": "Development", "capacityPerDay": 6}],
+                 "daysOff": []} for dev in self.devs]
+
+    def responder(self, method, caminho, consulta, corpo):
+        """(status, corpo JSON) de uma requisição"""
+        if caminho.endswith("/teamsettings/iterations"):
+            if "timeframe=current" in consulta:
+                return 200, {"value": [it for it in self.iteracoes if it["attributes"]["timeFrame"] == "current"]}
+            return 200, {"value": self.iteracoes}
+        if caminho.endswith("/capacities"):
+            return 200, {"value": self.capacidades()}
+        if caminho.endswith("/teamdaysoff"):
+            return 200, {"daysOff": []}
+        if caminho.endswith("/teamfieldvalues"):
+            return 200, {"field": {"referenceName": "System.AreaPath"}, "values": []}
+        if caminho.endswith("/wiql") and method == "POST":
+            iteracao = re.search(r"\[System\.IterationPath\] = '([^']*)'", corpo["query"])
+            ids = self.ids_da_sprint(iteracao.group(1)) if iteracao else []
+            return 200, {"workItems": [{"id": item_id} for item_id in ids]}
+        if caminho.endswith("/workitemsbatch") and method == "POST":
+            return 200, {"value": [self.item(item_id) for item_id in corpo["ids"]]}
+        return 404, {"message": f"Rota não simulada: {method} {caminho}"}
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    dados = None
+    chamadas = None
+    latencia = 0.0
+
+    def _atender(self, method):
+        with self.chamadas.get_lock():
+            self.chamadas.value += 1
+        url = urlparse(self.path)
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        corpo = json.loads(self.rfile.read(tamanho)) if tamanho else None
+        time.sleep(self.latencia)
+
+        status, resposta = self.dados.responder(method, url.path, url.query, corpo)
+        conteudo = json.dumps(resposta).encode()
+        etag = '"' + hashlib.sha256(conteudo).hexdigest()[:16] + '"'
+        # GETs repetidos são revalidados pelo dashboard; o mock responde 304 como o Azure DevOps
+        if method == "GET" and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(conteudo)))
+        if method == "GET":
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def do_GET(self):
+        self._atender("GET")
+
+    def do_POST(self):
+        self._atender("POST")
+
+    def log_message(self, *args):
+        pass
+
+
+def _servir_mock(porta, opcoes, chamadas, pronto):
+    handler = type("Handler", (_MockHandler,), {
+        "dados": MockAzureDevOps(opcoes["sprints"], opcoes["itens"], opcoes["devs"]),
+        "chamadas": chamadas,
+        "latencia": opcoes["latencia"] / 1000
+    })
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), handler)
+    pronto.set()
+    servidor.serve_forever()
+
+
+def iniciar_mock(porta, sprints, itens, devs, latencia_ms):
+    """Sobe o mock num processo separado (CPU e memória dele ficam fora da medição)
+
+    Devolve (processo, contador de chamadas compartilhado).
+    """
+    chamadas = multiprocessing.Value("i", 0)
+    pronto = multiprocessing.Event()
+    opcoes = {"sprints": sprints, "itens": itens, "devs": devs, "latencia": latencia_ms}
+    processo = multiprocessing.Process(target=_servir_mock, args=(porta, opcoes, chamadas, pronto), daemon=True)
+    processo.start()
+    if not pronto.wait(30):
+        processo.terminate()
+        raise RuntimeError("O mock da API não subiu em 30s")
+    return processo, chamadas
+
+
+def marcacoes_csv(devs, linhas=200, semente=42):
+    """CSV de marcações de horas no formato esperado por horas_extras.py"""
+    aleatorio = random.Random(semente)
+    inicio = datetime.now() - timedelta(days=30)
+    saida = ["user,date,title,type,minutes"]
+    for i in range(linhas):
+        data = inicio + timedelta(days=aleatorio.randint(0, 29))
+        saida.append(f"{aleatorio.choice(devs)},{data:%Y-%m-%d},Atividade {i},Desenvolvimento,{aleatorio.randint(30, 240)}")
+    return "\n".join(saida).encode()
+
+
+class _Sessao:
+    """Uma sessão de navegador simulada: abre cada página e interage com os widgets"""
+
+    def __init__(self, numero, csv, sprint_anterior, registrar):
+        self.numero = numero
+        self.csv = csv
+        self.sprint_anterior = sprint_anterior
+        self.registrar = registrar
+
+    def _rodar(self, pagina, at):
+        inicio = time.perf_counter()
+        try:
+            at.run(timeout=TIMEOUT_RERUN)
+            erro = next((e.value for e in at.exception), None)
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+        self.registrar(pagina, (time.perf_counter() - inicio) * 1000, erro)
+        return erro is None
+
+    def app(self):
+        at = AppTest.from_file(os.path.join(DIRETORIO, "app.py"), default_timeout=TIMEOUT_RERUN)
+        if not self._rodar("app.py", at):
+            return
+        # Troca para a sprint anterior e filtra a previsão por um dev
+        at.sidebar.selectbox[0].set_value(self.sprint_anterior)
+        if not self._rodar("app.py", at):
+            return
+        previsao = at.multiselect(key="previsao_devs")
+        if previsao.options:
+            previsao.set_value(previsao.options[self.numero % len(previsao.options)])
+            self._rodar("app.py", at)
+
+    def atividades(self):
+        at = AppTest.from_file(os.path.join(DIRETORIO, "pages", "atividades_sprint.py"), default_timeout=TIMEOUT_RERUN)
+        if not self._rodar("pages/atividades_sprint.py", at):
+            return
+        for i in range(1, len(ESTADOS) + 1):
+            at.main.selectbox[0].select_index(i)
+            self._rodar("pages/atividades_sprint.py", at)
+
+    def horas_extras(self):
+        at = AppTest.from_file(os.path.join(DIRETORIO, "horas_extras.py"), default_timeout=TIMEOUT_RERUN)
+        if not self._rodar("horas_extras.py", at):
+            return
+        at.sidebar.file_uploader[0].set_value([("marcacoes.csv", self.csv, "text/csv")])
+        if not self._rodar("horas_extras.py", at):
+            return
+        at.sidebar.radio[0].set_value("✅ Aprovação e Geração de Relatório")
+        if self._rodar("horas_extras.py", at) and at.checkbox:
+            at.checkbox[0].check()
+            self._rodar("horas_extras.py", at)
+
+
+def _uso_do_processo():
+    if resource is None:
+        return None, None
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss vem em KB no Linux
+    return uso.ru_utime + uso.ru_stime, uso.ru_maxrss / 1024
+
+
+def executar_carga(sessoes, rodadas, paginas, csv, sprint_anterior, rampa=0.0, progresso=None):
+    """Roda as sessões em paralelo e devolve as latências (ms) e os erros por página"""
+    latencias = {pagina: [] for pagina in paginas}
+    erros = {pagina: [] for pagina in paginas}
+    lock = threading.Lock()
+
+    def registrar(pagina, ms, erro):
+        with lock:
+            latencias[pagina].append(ms)
+            if erro:
+                erros[pagina].append(erro)
+
+    def simular(numero):
+        time.sleep(rampa * numero / max(sessoes, 1))
+        sessao = _Sessao(numero, csv, sprint_anterior, registrar)
+        cenarios = {"app.py": sessao.app, "pages/atividades_sprint.py": sessao.atividades,
+                    "horas_extras.py": sessao.horas_extras}
+        for _ in range(rodadas):
+            for pagina in paginas:
+                cenarios[pagina]()
+        if progresso:
+            progresso(numero)
+
+    with ThreadPoolExecutor(max_workers=sessoes, thread_name_prefix="sessao") as executor:
+        list(executor.map(simular, range(sessoes)))
+    return latencias, erros
+
+
+def resumir(latencias, erros, chamadas_api, sessoes, cpu_s, pico_rss_mb, duracao_s):
+    paginas = {}
+    for pagina, valores in latencias.items():
+        p50, p95, p99 = np.percentile(valores, (50, 95, 99)) if valores else (None, None, None)
+        paginas[pagina] = {"reruns": len(valores), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+                           "erros": len(erros[pagina]), "primeiro_erro": erros[pagina][0] if erros[pagina] else None}
+    return {
+        "sessoes": sessoes,
+        "duracao_s": duracao_s,
+        "paginas": paginas,
+        "chamadas_api": chamadas_api,
+        "chamadas_api_por_sessao": chamadas_api / sessoes,
+        "cpu_s": cpu_s,
+        "nucleos_medios": cpu_s / duracao_s if cpu_s is not None else None,
+        "pico_rss_mb": pico_rss_mb
+    }
+
+
+def _formatar(valor, formato="{:.0f}"):
+    return "n/d" if valor is None else formato.format(valor)
+
+
+def imprimir(resumo):
+    print(f"\n{'Página':<30}{'reruns':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>8}")
+    for pagina, linha in resumo["paginas"].items():
+        print(f"{pagina:<30}{linha['reruns']:>8}{_formatar(linha['p50_ms']):>10}"
+              f"{_formatar(linha['p95_ms']):>10}{_formatar(linha['p99_ms']):>10}{linha['erros']:>8}")
+    print(f"\nChamadas à API: {resumo['chamadas_api']} ({resumo['chamadas_api_por_sessao']:.1f} por sessão)")
+    print(f"CPU: {_formatar(resumo['cpu_s'], '{:.1f}')} s ({_formatar(resumo['nucleos_medios'], '{:.2f}')} núcleos em média)"
+          f" · pico de RSS: {_formatar(resumo['pico_rss_mb'])} MB · duração: {resumo['duracao_s']:.1f} s")
+    for pagina, linha in resumo["paginas"].items():
+        if linha["primeiro_erro"]:
+            print(f"❌ {pagina}: {linha['primeiro_erro']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula sessões simultâneas do dashboard contra um mock da API")
+    parser.add_argument("--sessoes", type=int, default=10, help="Sessões simultâneas")
+    parser.add_argument("--rodadas", type=int, default=2, help="Vezes que cada sessão repete o roteiro")
+    parser.add_argument("--paginas", nargs="+", choices=PAGINAS, default=list(PAGINAS))
+    parser.add_argument("--sprints", type=int, default=8, help="Sprints no mock")
+    parser.add_argument("--itens", type=int, default=2000, help="Work items por sprint no mock")
+    parser.add_argument("--devs", type=int, default=8, help="Desenvolvedores no mock")
+    parser.add_argument("--latencia-api", type=float, default=50, help="Latência simulada de cada chamada (ms)")
+    parser.add_argument("--rampa", type=float, default=0, help="Segundos para abrir todas as sessões")
+    parser.add_argument("--porta", type=int, default=8790, help="Porta do mock da API")
+    parser.add_argument("--json", help="Grava o resumo neste arquivo (para comparar execuções)")
+    args = parser.parse_args()
+
+    processo, chamadas = iniciar_mock(args.porta, args.sprints, args.itens, args.devs, args.latencia_api)
+    # As páginas importam dados_sprint dentro do teste: basta apontar a configuração para o mock
+    AZURE_CONFIG["BASE_URL"] = f"http://127.0.0.1:{args.porta}"
+    AZURE_CONFIG["DATA_DIR"] = tempfile.mkdtemp(prefix="sprintreview-carga-")
+    AZURE_CONFIG["PAT"] = AZURE_CONFIG["PAT"] or "carga"
+    AZURE_CONFIG["API_MODE"] = "live"
+    mock = MockAzureDevOps(args.sprints, args.itens, args.devs)
+    csv = marcacoes_csv(mock.devs)
+    # A penúltima iteração do mock é a atual; as sessões trocam para a anterior a ela
+    sprint_anterior = mock.iteracoes[max(args.sprints - 3, 0)]["path"]
+
+    print(f"Simulando {args.sessoes} sessões x {args.rodadas} rodadas em {', '.join(args.paginas)}...", flush=True)
+    cpu_antes, _ = _uso_do_processo()
+    inicio = time.perf_counter()
+    try:
+        latencias, erros = executar_carga(
+            args.sessoes, args.rodadas, args.paginas, csv, sprint_anterior, args.rampa,
+            progresso=lambda numero: print(f"sessão {numero + 1} concluída", flush=True))
+    finally:
+        processo.terminate()
+    duracao = time.perf_counter() - inicio
+    cpu_depois, pico_rss = _uso_do_processo()
+
+    resumo = resumir(latencias, erros, chamadas.value, args.sessoes,
+                     cpu_depois - cpu_antes if cpu_antes is not None else None, pico_rss, duracao)
+    imprimir(resumo)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(resumo, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+# Camada de dados compartilhada pelas páginas do dashboard
+import os
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+import streamlit as st
+
+from agregados import ESTADOS_CONCLUIDOS, TAG_SUSTENTACAO, SprintAggregates
+from azure_devops import AZURE_CONFIG, AzureDevOpsAPI
+from busca import SearchIndex
+from cache_sprints import SprintCache
+from capacidade import calcular_capacidade
+from exportacao import exportar_agregados_dev, exportar_para_bytes, exportar_work_items
+from gravacoes import GravacaoAusente
+from revisoes import RevisionStore
+from tabelas import TabelaIndexada
+from webhook import iniciar_receptor
+
+COLUNAS_CARD = ["ID", "Título", "Status", "Desenvolvedor", "Horas Trabalhadas"]
+COLUNAS_DEV = ["id", "title", "tipo", "state", "completed_work"]
+
+# União dos campos usados por todas as páginas: a sprint é baixada uma única vez
+CAMPOS_SPRINT = [
+    "System.Id", "System.Title", "System.AssignedTo", "System.State",
+    "System.WorkItemType", "System.Parent", "System.Tags",
+    "Microsoft.VSTS.Scheduling.OriginalEstimate", "Microsoft.VSTS.Scheduling.CompletedWork"
+]
+# Throughput das sprints passadas: só tipo e dev dos itens concluídos
+TIPOS_THROUGHPUT = ("Task", "Bug")
+CAMPOS_THROUGHPUT = ["System.Id", "System.WorkItemType", "System.AssignedTo"]
+# Índice de busca: só as colunas pesquisáveis, sem estimativas nem hierarquia
+CAMPOS_BUSCA = ["System.Id", "System.Title", "System.WorkItemType", "System.State", "System.AssignedTo", "System.Tags"]
+
+
+def baixar_iteracoes(api=None):
+    """Lista as iterações com data de início, ordenadas, e o path da sprint atual"""
+    api = api or AzureDevOpsAPI()
+    iteracoes = [it for it in api.get_all_iterations() if it["attributes"].get("startDate")]
+    iteracoes.sort(key=lambda it: it["attributes"]["startDate"])
+    # A lista já marca a sprint atual (timeFrame); a consulta $timeframe=current fica de reserva
+    atual = next((it for it in iteracoes if it["attributes"].get("timeFrame") == "current"), None)
+    current_path = atual["path"] if atual else api.get_current_iteration()[0]
+    return iteracoes, current_path
+
+
+def _capacidade_real(membros, folgas_time, inicio, fim):
+    """Capacidade da sprint; None se o time não tiver acesso ao cadastro (vale o modelo fixo)"""
+    try:
+        return calcular_capacidade(inicio, fim, membros.result(), folgas_time.result())
+    except (requests.RequestException, GravacaoAusente):
+        return None
+
+
+def baixar_sprint(iteration_path, iteracoes, api=None):
+    """Baixa a sprint uma vez, com todos os campos que as páginas precisam"""
+    api = api or AzureDevOpsAPI()
+    iteracao = next(it for it in iteracoes if it["path"] == iteration_path)
+    inicio = datetime.strptime(iteracao['attributes']['startDate'], '%Y-%m-%dT%H:%M:%SZ')
+    fim = datetime.strptime(iteracao['attributes']['finishDate'], '%Y-%m-%dT%H:%M:%SZ')
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="capacidade") as executor:
+        # A capacidade e as folgas do time chegam enquanto os work items são baixados
+        membros = executor.submit(api.get_capacidades, iteracao["id"])
+        folgas_time = executor.submit(api.get_dias_folga_time, iteracao["id"])
+        # Os IDs seguem direto da WIQL (particionada se preciso) para o workitemsbatch
+        work_items = list(api.iter_work_items_batch(api.iter_work_item_ids(iteration_path), CAMPOS_SPRINT))
+
+    return {
+        "path": iteration_path,
+        "name": iteracao["name"],
+        "inicio": inicio,
+        "fim": fim,
+        "work_items": work_items,
+        # Agregados por dev e por tipo/estado/tag, calculados uma vez na chegada dos dados
+        "agregados": SprintAggregates.from_work_items(work_items),
+        # Horas disponíveis de cada dev (capacidade cadastrada menos folgas e feriados)
+        "capacidade": _capacidade_real(membros, folgas_time, inicio, fim)
+    }
+
+
+def baixar_concluidos(iteration_path, api=None):
+    """Tasks e Bugs concluídos da sprint, contados por (tipo, dev)
+
+    A WIQL já filtra os concluídos e o workitemsbatch traz só tipo e dev: bem mais
+    leve que baixar a sprint inteira só para contar o throughput.
+    """
+    api = api or AzureDevOpsAPI()
+    ids = api.iter_work_item_ids(iteration_path, TIPOS_THROUGHPUT, ESTADOS_CONCLUIDOS)
+    return dict(Counter((wi.tipo, wi.dev) for wi in api.iter_work_items_batch(ids, CAMPOS_THROUGHPUT)))
+
+
+def baixar_itens_busca(iteration_path, api=None):
+    """Itens da sprint só com os campos do índice de busca (sem capacidade nem folgas)"""
+    api = api or AzureDevOpsAPI()
+    return list(api.iter_work_items_batch(api.iter_work_item_ids(iteration_path), CAMPOS_BUSCA))
+
+
+def equipes_configuradas():
+    """Times do portfólio; sem configuração, só o time padrão do projeto"""
+    return AZURE_CONFIG["TEAMS"] or [{"nome": AZURE_CONFIG["PROJECT"], "project": AZURE_CONFIG["PROJECT"]}]
+
+
+def baixar_sprint_atual(equipe):
+    api = AzureDevOpsAPI(equipe)
+    iteracoes, current_path = baixar_iteracoes(api)
+    return baixar_sprint(current_path, iteracoes, api)
+
+
+def baixar_portfolio(equipes):
+    """Sprint atual de cada time, baixadas em paralelo pelo mesmo pool de conexões
+
+    O custo total fica perto do time mais lento; a falha de um time não derruba os outros.
+    """
+    def baixar(equipe):
+        try:
+            return {"equipe": equipe, "sprint": baixar_sprint_atual(equipe), "erro": None}
+        except Exception as e:
+            return {"equipe": equipe, "sprint": None, "erro": str(e)}
+
+    with ThreadPoolExecutor(max_workers=len(equipes), thread_name_prefix="portfolio") as executor:
+        return list(executor.map(baixar, equipes))
+
+
+# Versões em cache compartilhadas por todas as sessões; as funções acima servem aos CLIs
+@st.cache_data(ttl=AZURE_CONFIG["SPRINT_CACHE_TTL"], show_spinner=False)
+def carregar_iteracoes():
+    return baixar_iteracoes()
+
+
+@st.cache_resource(show_spinner=False)
+def abrir_indice_busca():
+    return SearchIndex()
+
+
+@st.cache_resource(show_spinner=False)
+def abrir_historico():
+    # Uma conexão (e uma trava) por processo, compartilhada pelas páginas que leem o histórico
+    return RevisionStore()
+
+
+# Sprints compartilhadas pelo processo; os eventos do webhook são aplicados aqui
+_sprints = SprintCache(
+    ttl=AZURE_CONFIG["SPRINT_CACHE_TTL"],
+    orcamento_bytes=AZURE_CONFIG["SPRINT_CACHE_MB"] * 2**20,
+    diretorio=os.path.join(AZURE_CONFIG["DATA_DIR"], "snapshots")
+)
+
+
+def carregar_sprint(iteration_path):
+    """Sprint em cache (somente leitura); cada mudança recebida gera uma nova versão"""
+    def baixar():
+        iteracoes, _ = carregar_iteracoes()
+        sprint = baixar_sprint(iteration_path, iteracoes)
+        # Toda sprint baixada alimenta o índice de busca; só os itens alterados são regravados
+        abrir_indice_busca().indexar_sprint(iteration_path, sprint["work_items"])
+        return sprint
+
+    return _sprints.obter(iteration_path, baixar)
+
+
+@st.cache_data(ttl=AZURE_CONFIG["SPRINT_CACHE_TTL"], max_entries=64, show_spinner=False)
+def carregar_concluidos(iteration_path):
+    return baixar_concluidos(iteration_path)
+
+
+def carregar_historico(iteration_path, quantidade=AZURE_CONFIG["FORECAST_HISTORY"]):
+    """Concluídos por (tipo, dev) das `quantidade` sprints anteriores, buscados em paralelo
+
+    Sprints que falharem ficam de fora do histórico em vez de derrubar a previsão.
+    """
+    iteracoes, _ = carregar_iteracoes()
+    posicao = next(i for i, it in enumerate(iteracoes) if it["path"] == iteration_path)
+    paths = [it["path"] for it in iteracoes[max(posicao - quantidade, 0):posicao]]
+    if not paths:
+        return []
+
+    def carregar(path):
+        try:
+            return carregar_concluidos(path)
+        except (requests.RequestException, GravacaoAusente):
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(paths), thread_name_prefix="historico") as executor:
+        return [contagem for contagem in executor.map(carregar, paths) if contagem is not None]
+
+
+def aplicar_mudanca(item_id, novo, iteracao, iteracao_anterior=None):
+    """Aplica um item alterado (ou removido) no cache de sprints e no índice de busca"""
+    alteradas = _sprints.aplicar(item_id, novo, iteracao, iteracao_anterior)
+    if novo is None:
+        abrir_indice_busca().remover_item(item_id)
+    else:
+        abrir_indice_busca().indexar_itens(iteracao, [novo])
+    return alteradas
+
+
+@st.cache_resource(show_spinner=False)
+def iniciar_webhook():
+    """Sobe o receptor de service hooks uma vez por processo, se houver porta configurada"""
+    if not AZURE_CONFIG["WEBHOOK_PORT"]:
+        return None
+    return iniciar_receptor(aplicar_mudanca, AZURE_CONFIG["WEBHOOK_PORT"], AZURE_CONFIG["WEBHOOK_HOST"],
+                            AZURE_CONFIG["WEBHOOK_SECRET"])
+
+
+@st.fragment(run_every=AZURE_CONFIG["WEBHOOK_REFRESH"])
+def _acompanhar_mudancas(iteration_path):
+    """Recarrega a página (da memória) quando um evento altera a sprint exibida"""
+    versao = _sprints.versao(iteration_path)
+    chave = f"versao_sprint::{iteration_path}"
+    vista = st.session_state.get(chave)
+    st.session_state[chave] = versao
+    if vista is not None and versao != vista:
+        st.rerun()
+
+
+@st.cache_data(ttl=AZURE_CONFIG["SPRINT_CACHE_TTL"], show_spinner=False)
+def carregar_portfolio():
+    return baixar_portfolio(equipes_configuradas())
+
+
+# Valores derivados ficam na entrada da sprint no cache: contam no orçamento de memória
+# e saem junto com ela (despejo ou nova versão)
+def carregar_indice_por_pai(iteration_path):
+    sprint = carregar_sprint(iteration_path)
+    return _sprints.derivado(sprint, "indice_por_pai", lambda: _indice_por_pai(sprint["work_items"]), _tamanho_indice)
+
+
+def _indice_por_pai(work_items):
+    """Índice {pai: {estado: [tarefas]}} da sprint, montado uma vez por versão e compartilhado (somente leitura)
+
+    A chave "Todos" de cada pai guarda as tarefas na ordem original.
+    """
+    dados_pais = {}
+    indice = defaultdict(lambda: defaultdict(list))
+
+    for wi in work_items:
+        if wi.tipo == "User Story":
+            dados_pais[wi.id] = wi.title or f"User Story #{wi.id}"
+            continue
+        tarefa = {
+            "id": wi.id,
+            "title": wi.title,
+            "dev": wi.dev,
+            "horas": wi.completed_work,
+            "state": wi.state,
+            "tipo": wi.tipo,
+            "is_code_review": '[Gestão]CodeReview' in wi.title
+        }
+        por_estado = indice[wi.parent]
+        por_estado["Todos"].append(tarefa)
+        por_estado[tarefa["state"]].append(tarefa)
+
+    return dados_pais, {pai: dict(por_estado) for pai, por_estado in indice.items()}
+
+
+def _tamanho_indice(indice):
+    dados_pais, por_pai = indice
+    # Cada tarefa é um dict; as listas por estado só guardam referências a elas
+    return sys.getsizeof(dados_pais) + sum(
+        sys.getsizeof(lista) + (sum(map(sys.getsizeof, lista)) if estado == "Todos" else 0)
+        for por_estado in por_pai.values() for estado, lista in por_estado.items())
+
+
+def carregar_tabelas(sprint):
+    # Recebe a sprint já carregada: tabelas e agregados da página saem da mesma versão
+    return _sprints.derivado(sprint, "tabelas", lambda: _tabelas(sprint["work_items"]), _tamanho_tabelas)
+
+
+def _tabelas(work_items):
+    """Tabelas indexadas dos cards do dashboard, montadas uma vez por versão e compartilhadas (somente leitura)"""
+    def card(itens):
+        return TabelaIndexada.de_linhas([(wi.id, wi.title, wi.state, wi.dev, wi.completed_work) for wi in itens], COLUNAS_CARD)
+
+    # User Stories não entram nos itens por dev (mesma regra dos agregados)
+    por_dev = defaultdict(list)
+    for wi in work_items:
+        if wi.tipo != 'User Story':
+            por_dev[wi.dev].append(wi)
+
+    return {
+        "user_stories": TabelaIndexada.de_linhas(
+            [(us["id"], us["title"], us["state"], us["dev"], us["completed_work"]) for us in derivar_user_stories(work_items)],
+            COLUNAS_CARD),
+        "tasks_done": card(wi for wi in work_items if wi.tipo == 'Task' and wi.state.lower() in ESTADOS_CONCLUIDOS),
+        "bugs": card(wi for wi in work_items if wi.tipo == 'Bug'),
+        "sustentacao": card(wi for itens in por_dev.values() for wi in itens if TAG_SUSTENTACAO in wi.title.lower()),
+        "devs": {
+            dev: TabelaIndexada.de_linhas([(wi.id, wi.title, wi.tipo, wi.state, wi.completed_work) for wi in itens], COLUNAS_DEV)
+            for dev, itens in por_dev.items()
+        }
+    }
+
+
+def _tamanho_tabelas(tabelas):
+    return sum(tabela.tamanho_bytes() for nome, tabela in tabelas.items() if nome != "devs") + sum(
+        tabela.tamanho_bytes() for tabela in tabelas["devs"].values())
+
+
+def carregar_exportacoes(sprint):
+    """Parquet dos work items e dos agregados por dev da versão atual da sprint"""
+    # Os bytes são imutáveis: gerados uma vez por versão e servidos a todas as sessões e reruns
+    return _sprints.derivado(sprint, "exportacoes", lambda: {
+        "work_items": exportar_para_bytes(exportar_work_items, [sprint]),
+        "agregados_dev": exportar_para_bytes(exportar_agregados_dev, [sprint])
+    }, lambda exportacoes: sum(map(len, exportacoes.values())))
+
+
+def create_sprint_selector():
+    """Seletor de sprint na sidebar; a escolha vale para todas as páginas"""
+    all_iterations, current_path = carregar_iteracoes()
+    current_index = next(i for i, it in enumerate(all_iterations) if it["path"] == current_path)
+
+    # Seleciona 2 anteriores, a atual e 2 futuras
+    start = max(current_index - 2, 0)
+    end = min(current_index + 3, len(all_iterations))
+    visible_sprints = all_iterations[start:end]
+    sprint_paths = [it["path"] for it in visible_sprints]
+    sprint_names = {it["path"]: it["name"] for it in visible_sprints}
+
+    # Guardado fora da key do widget para sobreviver à troca de página
+    selecionada = st.session_state.get("sprint_path", current_path)
+    if selecionada not in sprint_paths:
+        selecionada = current_path
+
+    selected_path = st.sidebar.selectbox(
+        "📅 Selecione a Sprint", sprint_paths,
+        index=sprint_paths.index(selecionada),
+        format_func=sprint_names.get
+    )
+    st.session_state["sprint_path"] = selected_path
+    if iniciar_webhook() is not None:
+        with st.sidebar:
+            _acompanhar_mudancas(selected_path)
+        st.sidebar.caption("🔔 Atualização automática por webhook ativa.")
+    with st.sidebar.expander("📦 Cache de sprints"):
+        resumo = _sprints.resumo()
+        st.caption(
+            f"{resumo['sprints_em_memoria']} sprints em memória · "
+            f"{resumo['usado_mb']:.1f} de {resumo['orcamento_mb']:.0f} MB · "
+            f"{resumo['acertos']} acertos, {resumo['faltas']} faltas · "
+            f"{resumo['despejos']} despejos para disco, {resumo['recargas']} recargas"
+            + (f" ({resumo['recarga_ms_media']:.0f} ms em média)" if resumo['recarga_ms_media'] is not None else "")
+        )
+    if AZURE_CONFIG["API_MODE"] == "replay":
+        st.sidebar.info("📼 Modo offline: dados das gravações locais da API.")
+    return selected_path
+
+
+def derivar_user_stories(work_items):
+    """User Stories da sprint com as horas somadas das tasks filhas (System.Parent)"""
+    horas_por_pai = defaultdict(float)
+    for wi in work_items:
+        if wi.parent is not None:
+            horas_por_pai[wi.parent] += wi.completed_work
+
+    return [
+        {
+            "id": wi.id,
+            "title": wi.title,
+            "state": wi.state,
+            "dev": wi.dev,
+            "completed_work": horas_por_pai.get(wi.id, 0)
+        }
+        for wi in work_items if wi.tipo == 'User Story'
+    ]
@@ -0,0 +1,64 @@
+# Comparação entre duas sprints: o que continuou, entrou, saiu, trocou de dono ou de estado
+from agregados import TAG_NAO_PLANEJADA
+from work_item import WorkItem
+
+CATEGORIAS = ("continuadas", "adicionadas", "removidas", "reatribuidas", "mudaram_estado")
+
+
+def comparar_sprints(anterior, atual, estados_na_anterior=None):
+    """Junta as duas listas de work items por ID (índices em dict) e classifica cada item
+
+    - continuadas: estão nas duas sprints (pares anterior/atual)
+    - adicionadas: só na atual (incluindo as [nãoplanejada] criadas durante a sprint)
+    - removidas: só na anterior
+    - reatribuidas / mudaram_estado: subconjuntos das continuadas
+
+    Um item só tem uma iteração por vez, então a consulta da sprint anterior não traz
+    os itens levados para a atual. `estados_na_anterior` ({id: (dev, estado)} do
+    histórico de revisões) recupera esses itens com o dev e o estado que tinham lá.
+    """
+    por_id_anterior = {wi.id: wi for wi in anterior}
+    por_id_atual = {wi.id: wi for wi in atual}
+    estados_na_anterior = estados_na_anterior or {}
+    resultado = {categoria: [] for categoria in CATEGORIAS}
+
+    for item_id, novo in por_id_atual.items():
+        antigo = por_id_anterior.get(item_id)
+        if antigo is None:
+            if item_id not in estados_na_anterior:
+                resultado["adicionadas"].append(novo)
+                continue
+            dev, estado = estados_na_anterior[item_id]
+            antigo = WorkItem(item_id, novo.title, novo.tipo, estado or "", dev or "Não atribuído")
+        resultado["continuadas"].append((antigo, novo))
+        if antigo.dev != novo.dev:
+            resultado["reatribuidas"].append((antigo, novo))
+        if antigo.state != novo.state:
+            resultado["mudaram_estado"].append((antigo, novo))
+
+    resultado["removidas"] = [wi for item_id, wi in por_id_anterior.items() if item_id not in por_id_atual]
+    return resultado
+
+
+def linhas_para_tabela(diff):
+    """{categoria: [dict, ...]} prontos para DataFrame"""
+    def par(antigo, novo):
+        return {
+            "ID": novo.id, "Título": novo.title, "Tipo": novo.tipo,
+            "Dev anterior": antigo.dev, "Dev": novo.dev,
+            "Estado anterior": antigo.state, "Estado": novo.state
+        }
+
+    def item(wi):
+        return {
+            "ID": wi.id, "Título": wi.title, "Tipo": wi.tipo, "Dev": wi.dev, "Estado": wi.state,
+            "Não planejada": TAG_NAO_PLANEJADA in wi.title.lower()
+        }
+
+    return {
+        "continuadas": [par(*p) for p in diff["continuadas"]],
+        "adicionadas": [item(wi) for wi in diff["adicionadas"]],
+        "removidas": [item(wi) for wi in diff["removidas"]],
+        "reatribuidas": [par(*p) for p in diff["reatribuidas"]],
+        "mudaram_estado": [par(*p) for p in diff["mudaram_estado"]]
+    }
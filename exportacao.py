@@ -0,0 +1,177 @@
+# Exportação colunar (Parquet / Arrow IPC) dos dados da sprint para as ferramentas de BI
+import argparse
+import os
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from marcacoes import preparar_marcacoes
+
+TAMANHO_LOTE = 10_000
+
+# Strings simples: o Parquet já aplica dicionário por coluna, e o IPC não aceita trocar
+# o dicionário entre lotes
+SCHEMA_WORK_ITEMS = pa.schema([
+    ("sprint", pa.string()),
+    ("id", pa.int64()),
+    ("title", pa.string()),
+    ("tipo", pa.string()),
+    ("state", pa.string()),
+    ("dev", pa.string()),
+    ("parent", pa.int64()),
+    ("original_estimate", pa.float64()),
+    ("completed_work", pa.float64()),
+    ("tags", pa.string()),
+])
+
+SCHEMA_AGREGADOS_DEV = pa.schema([
+    ("sprint", pa.string()),
+    ("dev", pa.string()),
+    ("total_itens", pa.int64()),
+    ("nao_planejadas", pa.int64()),
+    ("concluidos", pa.int64()),
+    ("done", pa.int64()),
+    ("horas_trabalhadas", pa.float64()),
+])
+
+
+class Escritor:
+    """Escreve lotes num arquivo Parquet ou Arrow IPC sem montar a tabela inteira em memória"""
+
+    def __init__(self, destino, schema, formato, comprimir=False):
+        if formato == "parquet":
+            self._writer = pq.ParquetWriter(destino, schema, compression="zstd")
+        elif formato == "arrow":
+            # Por padrão sem compressão: o leitor pode mapear o arquivo em memória sem cópia
+            opcoes = pa.ipc.IpcWriteOptions(compression="zstd" if comprimir else None)
+            self._writer = pa.ipc.new_file(destino, schema, options=opcoes)
+        else:
+            raise ValueError(f"Formato de exportação desconhecido: {formato}")
+
+    def escrever(self, lote):
+        if lote.num_rows:
+            self._writer.write_batch(lote)
+
+    def fechar(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def lotes_work_items(sprint_path, work_items, schema=SCHEMA_WORK_ITEMS):
+    """Work items em RecordBatches de até TAMANHO_LOTE linhas, no `schema` pedido"""
+    tabela = getattr(work_items, "tabela", None)
+    if tabela is not None:
+        # Sprint relida de snapshot: as colunas já estão em Arrow, sem passar por objetos Python
+        for lote in tabela.to_batches(TAMANHO_LOTE):
+            yield pa.RecordBatch.from_arrays(lote.columns, schema=schema)
+        return
+    for i in range(0, len(work_items), TAMANHO_LOTE):
+        lote = work_items[i:i + TAMANHO_LOTE]
+        yield pa.RecordBatch.from_pydict({
+            "sprint": [sprint_path] * len(lote),
+            "id": [wi.id for wi in lote],
+            "title": [wi.title for wi in lote],
+            "tipo": [wi.tipo for wi in lote],
+            "state": [wi.state for wi in lote],
+            "dev": [wi.dev for wi in lote],
+            "parent": [wi.parent for wi in lote],
+            "original_estimate": [float(wi.original_estimate) for wi in lote],
+            "completed_work": [float(wi.completed_work) for wi in lote],
+            "tags": [wi.tags for wi in lote],
+        }, schema=schema)
+
+
+def _lote_agregados_dev(sprint):
+    linhas = sprint["agregados"].por_dev
+    return pa.RecordBatch.from_pydict({
+        "sprint": [sprint["path"]] * len(linhas),
+        "dev": list(linhas),
+        **{campo: [linha[campo] for linha in linhas.values()] for campo in SCHEMA_AGREGADOS_DEV.names[2:]}
+    }, schema=SCHEMA_AGREGADOS_DEV)
+
+
+def exportar_work_items(destino, sprints, formato="parquet"):
+    """Grava os work items normalizados de uma ou mais sprints, lote a lote"""
+    with Escritor(destino, SCHEMA_WORK_ITEMS, formato) as escritor:
+        for sprint in sprints:
+            for lote in lotes_work_items(sprint["path"], sprint["work_items"]):
+                escritor.escrever(lote)
+
+
+def exportar_agregados_dev(destino, sprints, formato="parquet"):
+    """Grava a tabela agregada por dev de cada sprint"""
+    with Escritor(destino, SCHEMA_AGREGADOS_DEV, formato) as escritor:
+        for sprint in sprints:
+            escritor.escrever(_lote_agregados_dev(sprint))
+
+
+def exportar_horas_extras(destino, arquivos_csv, formato="parquet"):
+    """Converte os CSVs de marcações bloco a bloco, já com as colunas de hora extra"""
+    escritor = schema = None
+    try:
+        for arquivo in arquivos_csv:
+            for lote in pa_csv.open_csv(arquivo):
+                df = preparar_marcacoes(lote.to_pandas())
+                tabela = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+                if escritor is None:
+                    schema = tabela.schema
+                    escritor = Escritor(destino, schema, formato)
+                for batch in tabela.to_batches():
+                    escritor.escrever(batch)
+    finally:
+        if escritor is not None:
+            escritor.fechar()
+
+
+def exportar_para_bytes(exportar, *args, formato="parquet"):
+    """Executa uma exportação num buffer em memória (para o st.download_button)"""
+    sink = pa.BufferOutputStream()
+    exportar(sink, *args, formato=formato)
+    return sink.getvalue().to_pybytes()
+
+
+def ler_exportacao(caminho):
+    """Abre uma exportação; arquivos Arrow IPC são mapeados em memória sem cópia"""
+    if caminho.endswith(".parquet"):
+        return pq.read_table(caminho, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(caminho, "r")).read_all()
+
+
+def main():
+    from dados_sprint import baixar_iteracoes, baixar_sprint
+
+    parser = argparse.ArgumentParser(description="Exporta sprints para Parquet ou Arrow IPC")
+    parser.add_argument("sprints", nargs="*", help="Paths das iterações (padrão: sprint atual)")
+    parser.add_argument("--saida", default="exportacao", help="Diretório de saída")
+    parser.add_argument("--formato", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--horas-extras", nargs="*", default=[], help="CSVs de marcações de horas")
+    args = parser.parse_args()
+
+    os.makedirs(args.saida, exist_ok=True)
+    iteracoes, current_path = baixar_iteracoes()
+
+    destino_itens = os.path.join(args.saida, f"work_items.{args.formato}")
+    destino_devs = os.path.join(args.saida, f"agregados_dev.{args.formato}")
+    with Escritor(destino_itens, SCHEMA_WORK_ITEMS, args.formato) as itens, \
+            Escritor(destino_devs, SCHEMA_AGREGADOS_DEV, args.formato) as devs:
+        # Cada sprint é baixada, gravada e liberada antes da próxima
+        for path in args.sprints or [current_path]:
+            print(f"Exportando {path}...", flush=True)
+            sprint = baixar_sprint(path, iteracoes)
+            for lote in lotes_work_items(sprint["path"], sprint["work_items"]):
+                itens.escrever(lote)
+            devs.escrever(_lote_agregados_dev(sprint))
+
+    if args.horas_extras:
+        exportar_horas_extras(os.path.join(args.saida, f"horas_extras.{args.formato}"), args.horas_extras, args.formato)
+    print(f"✅ Exportação concluída em {args.saida}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Gravação e reprodução das respostas da API do Azure DevOps (modo offline)
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+class GravacaoAusente(Exception):
+    """Não existe resposta gravada para a requisição pedida"""
+
+
+def _escrever_atomico(caminho, conteudo):
+    diretorio = os.path.dirname(caminho)
+    fd, temporario = tempfile.mkstemp(dir=diretorio)
+    with os.fdopen(fd, "wb") as arquivo:
+        arquivo.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+class ResponseRecorder:
+    """Respostas comprimidas e endereçadas por conteúdo
+
+    `blobs/<sha256 do corpo>.json.gz` guarda cada corpo distinto uma única vez;
+    `requisicoes/<sha256 da requisição>.json` aponta a requisição para o blob.
+    Credenciais não fazem parte da chave, então a reprodução dispensa o PAT.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        os.makedirs(os.path.join(diretorio, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(diretorio, "requisicoes"), exist_ok=True)
+
+    @staticmethod
+    def chave(method, url, corpo):
+        return hashlib.sha256(f"{method} {url}\n{corpo}".encode()).hexdigest()
+
+    def gravar(self, method, url, corpo, conteudo):
+        digest = hashlib.sha256(conteudo).hexdigest()
+        blob = os.path.join(self.diretorio, "blobs", f"{digest}.json.gz")
+        if not os.path.exists(blob):
+            _escrever_atomico(blob, gzip.compress(conteudo, mtime=0))
+
+        indice = {"method": method, "url": url, "body": corpo, "blob": digest, "gravado_em": int(time.time())}
+        _escrever_atomico(
+            os.path.join(self.diretorio, "requisicoes", f"{self.chave(method, url, corpo)}.json"),
+            json.dumps(indice, ensure_ascii=False).encode())
+
+    def reproduzir(self, method, url, corpo):
+        caminho = os.path.join(self.diretorio, "requisicoes", f"{self.chave(method, url, corpo)}.json")
+        try:
+            with open(caminho, encoding="utf-8") as arquivo:
+                digest = json.load(arquivo)["blob"]
+            with gzip.open(os.path.join(self.diretorio, "blobs", f"{digest}.json.gz"), "rb") as blob:
+                return blob.read()
+        except FileNotFoundError:
+            raise GravacaoAusente(f"Nenhuma resposta gravada para {method} {url}") from None
@@ -0,0 +1,21 @@
+# Preparação das marcações de horas (CSV) usada pela página de horas extras e pela exportação
+import pandas as pd
+
+# Feriados (dd-mm) usados nas horas extras e na capacidade da sprint
+FERIADOS = [
+    '01-01', '07-09', '25-12', '01-05',  # Nacionais
+    '25-01', '09-07',                    # SP
+    '19-03', '15-08'                     # Ribeirão Preto
+]
+
+
+def preparar_marcacoes(df):
+    """Adiciona as colunas de feriado/fim de semana/hora extra e as horas de cada marcação"""
+    df['date'] = pd.to_datetime(df['date'])
+    df['dia_semana'] = df['date'].dt.dayofweek
+    df['feriado'] = df['date'].dt.strftime('%d-%m').isin(FERIADOS)
+    df['fim_de_semana'] = df['dia_semana'] >= 5
+    df['fora_horario_comercial'] = False
+    df['hora_extra'] = df['feriado'] | df['fim_de_semana'] | df['fora_horario_comercial']
+    df['horas'] = df['minutes'] / 60
+    return df
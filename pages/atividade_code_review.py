@@ -0,0 +1,86 @@
+# Página de análise de Code Review com 3 cards
+import streamlit as st
+import re
+
+from dados_sprint import carregar_sprint, create_sprint_selector
+
+st.title("🛠️ Análise Completa de Code Review (3 Cards)")
+
+try:
+    iteration_path = create_sprint_selector()
+    all_details = carregar_sprint(iteration_path)["work_items"]
+
+    atividades_code_review = []
+    atividades_real = []
+
+    for item in all_details:
+        title = item.title
+
+        # Detectar code review
+        if '[Gestão]CodeReview - Tipo:' in title:
+            match = re.search(r'Atividade Nº[:\s]*(\d+)', title)
+            if match:
+                id_ref = int(match.group(1))
+                atividades_code_review.append({
+                    "id": item.id,
+                    "tipo": item.tipo,
+                    "state": item.state,
+                    "title": title,
+                    "referencia": id_ref,
+                    "horas_code_review": item.completed_work,
+                    "dev": item.dev
+                })
+
+        # Detectar atividades reais em estado Code Review
+        elif item.state == 'Code Review':
+            atividades_real.append({
+                "id": item.id,
+                "dev": item.dev,
+                "title": title,
+                "horas": item.completed_work,
+                "state": item.state
+            })
+
+    st.subheader("📘 Atividades reais em estado 'Code Review'")
+    for atividade in atividades_real:
+        with st.container():
+            st.markdown(f"### {atividade['title']} (#{atividade['id']})")
+            st.markdown(f"👨‍💻 **Desenvolvedor:** {atividade['dev']}")
+            st.markdown(f"⏱️ **Horas apontadas:** {atividade['horas']}")
+            st.markdown(f"📌 **Status:** {atividade['state']}")
+            st.markdown("---")
+
+    st.subheader("📗 Atividades de [Gestão]CodeReview")
+    for code in atividades_code_review:
+        with st.container():
+            st.markdown(f"### {code['title']} (#{code['id']})")
+            st.markdown(f"🔗 **Referência:** {code['referencia']}")
+            st.markdown(f"👨‍💻 **Desenvolvedor:** {code['dev']}")
+            st.markdown(f"📊 **Horas Code Review:** {code['horas_code_review']} | 📌 **Estado:** {code['state']}")
+            st.markdown("---")
+
+    st.subheader("📙 Comparativo entre Code Review e Atividade Referenciada")
+    for cr in atividades_code_review:
+        ref_id = cr["referencia"]
+        atividade_ref = next((a for a in atividades_real if a["id"] == ref_id), None)
+        if atividade_ref:
+            with st.container():
+                st.markdown(f"### 🔗 Referência: {ref_id} - {atividade_ref['title']} (#{ref_id})")
+                st.markdown(f"🧪 **Code Review:** {cr['title']} (#{cr['id']})")
+                st.markdown(f"⏱️ **Horas Code Review:** {cr['horas_code_review']} | **Status Code Review:** {cr['state']}")
+                st.markdown(f"💻 **Horas Desenvolvimento:** {atividade_ref['horas']} | **Status Atividade:** {atividade_ref['state']}")
+                st.markdown("---")
+
+    ids_referenciados = set(c['referencia'] for c in atividades_code_review)
+    st.subheader("🚨 Atividades em 'Code Review' sem [Gestão]CodeReview correspondente")
+    faltando = [a for a in atividades_real if a['id'] not in ids_referenciados]
+    for atividade in faltando:
+        with st.container():
+            st.markdown(f"🚨 **{atividade['title']}** (#{atividade['id']})")
+            st.markdown(f"👨‍💻 **Desenvolvedor:** {atividade['dev']}")
+            st.markdown(f"⏱️ **Horas:** {atividade['horas']}")
+            st.markdown("---")
+
+except Exception as e:
+    st.error("Erro ao carregar dados da sprint.")
+    st.exception(e)
\ No newline at end of file
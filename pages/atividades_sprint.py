@@ -0,0 +1,55 @@
+# Página de Code Review agrupada por User Story (Pai)
+import streamlit as st
+
+from dados_sprint import carregar_indice_por_pai, create_sprint_selector
+
+st.set_page_config(layout="wide")
+st.title("🧩 Atividade Sprint-116 agrupado por User Story")
+
+
+# User Stories por página: cada rerun monta e envia só os cards visíveis
+PAIS_POR_PAGINA = 20
+
+
+@st.fragment
+def exibir_atividades(dados_pais, indice):
+    # Só este fragmento reexecuta ao trocar o filtro ou a página: nada de rede, só consultas ao índice
+    estado_filtro = st.selectbox(
+        "Filtrar atividades por estado:",
+        options=["Todos", "To Do", "In Progress", "Code Review", "Done"],
+        index=0
+    )
+
+    # pula os pais sem nenhuma atividade no filtro
+    pais = [(pai_id, por_estado[estado_filtro]) for pai_id, por_estado in indice.items() if por_estado.get(estado_filtro)]
+    total_paginas = max(-(-len(pais) // PAIS_POR_PAGINA), 1)
+    if st.session_state.get("atividades_pagina", 1) > total_paginas:
+        st.session_state["atividades_pagina"] = total_paginas
+    pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, key="atividades_pagina")
+    inicio = (pagina - 1) * PAIS_POR_PAGINA
+    st.caption(f"{len(pais)} User Stories com atividades neste filtro")
+
+    for pai_id, tarefas_filtradas in pais[inicio:inicio + PAIS_POR_PAGINA]:
+        # Um único bloco HTML por User Story, com todas as tarefas dela
+        cards = "".join(f"""
+                <div style='background-color:{"#f0f9ff" if t['is_code_review'] else "#f9f9f9"}; border:1px solid #ddd; border-radius:8px; padding:10px; margin-bottom:10px;'>
+                    <b>{t['title']}</b> (#{t['id']})<br>
+                    👨‍💻 <b>Dev:</b> {t['dev']} | ⏱️ <b>Horas:</b> {t['horas']} | 📌 <b>Status:</b> {t['state']} | 🏷️ <b>Tipo:</b> {t['tipo']}
+                </div>
+            """ for t in tarefas_filtradas)
+        st.markdown(f"""
+        <div style='border: 2px solid #ccc; border-radius: 10px; padding: 20px; margin: 15px 0;'>
+            <h4 style='margin-bottom: 10px;'>🧠 <b>{dados_pais.get(pai_id, f'User Story #{pai_id}')}</b></h4>
+            {cards}
+        </div>
+        """, unsafe_allow_html=True)
+
+
+try:
+    iteration = create_sprint_selector()
+    dados_pais, indice = carregar_indice_por_pai(iteration)
+    exibir_atividades(dados_pais, indice)
+
+except Exception as e:
+    st.error("Erro ao carregar atividades.")
+    st.exception(e)
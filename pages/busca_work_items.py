@@ -0,0 +1,50 @@
+# Página de busca textual nos work items de todas as sprints já carregadas
+import time
+
+import pandas as pd
+import streamlit as st
+
+from backfill import BackfillScheduler, formatar_eta
+from dados_sprint import abrir_indice_busca, carregar_iteracoes
+
+st.set_page_config(layout="wide")
+st.title("🔎 Busca de Work Items")
+
+try:
+    indice = abrir_indice_busca()
+    iteracoes, _ = carregar_iteracoes()
+
+    if st.sidebar.button("🗂️ Indexar todas as sprints"):
+        barra = st.sidebar.progress(0.0)
+        scheduler = BackfillScheduler(indice=indice)
+        resultado = scheduler.executar(
+            iteracoes,
+            progresso=lambda feitas, total, eta, _: barra.progress(
+                feitas / total, text=f"{feitas}/{total} sprints · ETA {formatar_eta(eta)}")
+        )
+        st.sidebar.success(f"{resultado['concluidas']} sprints indexadas, {resultado['falhas']} com falha.")
+
+    estatisticas = indice.estatisticas()
+    st.caption(f"{estatisticas['itens']} itens indexados em {estatisticas['sprints']} sprints.")
+
+    col1, col2 = st.columns([3, 1])
+    texto = col1.text_input("Buscar por título, tags, dev ou estado", placeholder="[sustentação] login, 1234, Code Review...")
+    nomes = {it["path"]: it["name"] for it in iteracoes}
+    sprint = col2.selectbox("Sprint", [None] + list(nomes), format_func=lambda p: "Todas" if p is None else nomes[p])
+
+    if texto:
+        inicio = time.perf_counter()
+        resultados = indice.buscar(texto, limite=200, sprint=sprint)
+        decorrido = (time.perf_counter() - inicio) * 1000
+        st.caption(f"{len(resultados)} resultados em {decorrido:.1f} ms")
+
+        if resultados:
+            df = pd.DataFrame(resultados).drop(columns="score")
+            df["sprint"] = df["sprint"].map(lambda p: nomes.get(p, p))
+            st.dataframe(df, use_container_width=True, hide_index=True)
+        else:
+            st.info("Nenhum item encontrado.")
+
+except Exception as e:
+    st.error("Erro ao buscar work items.")
+    st.exception(e)
@@ -0,0 +1,57 @@
+# Página de comparação entre duas sprints (continuadas, adicionadas, removidas, reatribuídas, mudança de estado)
+import time
+
+import pandas as pd
+import streamlit as st
+
+from dados_sprint import abrir_historico, carregar_iteracoes, carregar_sprint, create_sprint_selector
+from diff_sprints import comparar_sprints, linhas_para_tabela
+
+TITULOS = {
+    "continuadas": "🔁 Continuadas",
+    "adicionadas": "➕ Adicionadas",
+    "removidas": "➖ Removidas",
+    "reatribuidas": "👥 Reatribuídas",
+    "mudaram_estado": "🔀 Mudaram de estado"
+}
+
+st.set_page_config(layout="wide")
+st.title("🆚 Comparar Sprints")
+
+try:
+    iteration_path = create_sprint_selector()
+    all_iterations, _ = carregar_iteracoes()
+    paths = [it["path"] for it in all_iterations]
+    nomes = {it["path"]: it["name"] for it in all_iterations}
+    posicao = paths.index(iteration_path)
+    anterior_path = st.sidebar.selectbox(
+        "↩️ Comparar com", paths, index=max(posicao - 1, 0), format_func=nomes.get)
+
+    with st.spinner("Carregando as sprints..."):
+        anterior = carregar_sprint(anterior_path)
+        atual = carregar_sprint(iteration_path)
+
+    # Itens que saíram da sprint anterior para a atual só aparecem no histórico de revisões
+    estados_na_anterior = abrir_historico().estados_na_iteracao(anterior_path)
+    if not estados_na_anterior:
+        st.warning("⚠️ Sem histórico de revisões da sprint anterior: os itens levados para a atual aparecem "
+                   "como adicionados e sem mudança de dono ou estado. Sincronize na página Histórico da Sprint.")
+
+    inicio = time.perf_counter()
+    diff = comparar_sprints(anterior["work_items"], atual["work_items"], estados_na_anterior)
+    st.caption(f"{anterior['name']} → {atual['name']}: comparação em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    colunas = st.columns(len(TITULOS))
+    for coluna, (categoria, titulo) in zip(colunas, TITULOS.items()):
+        coluna.metric(titulo, len(diff[categoria]))
+
+    for categoria, linhas in linhas_para_tabela(diff).items():
+        with st.expander(f"{TITULOS[categoria]} ({len(linhas)})", expanded=categoria in ("adicionadas", "removidas")):
+            if linhas:
+                st.dataframe(pd.DataFrame(linhas), use_container_width=True, hide_index=True)
+            else:
+                st.info("Nenhum item.")
+
+except Exception as e:
+    st.error("Erro ao comparar as sprints.")
+    st.exception(e)
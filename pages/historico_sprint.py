@@ -0,0 +1,44 @@
+# Página de burndown, cycle time e tempo em Code Review a partir do histórico de revisões
+import pandas as pd
+import streamlit as st
+
+from dados_sprint import abrir_historico, carregar_sprint, create_sprint_selector
+from revisoes import RevisionStore
+
+# Páginas de 1000 revisões por clique: a carga inicial segue em cliques seguintes, da marca d'água
+PAGINAS_POR_SINCRONIZACAO = 20
+
+st.set_page_config(layout="wide")
+st.title("📉 Histórico da Sprint")
+
+try:
+    historico = abrir_historico()
+    iteration_path = create_sprint_selector()
+    sprint = carregar_sprint(iteration_path)
+
+    if st.sidebar.button("🔄 Sincronizar revisões"):
+        paginas = []
+        with st.spinner("Buscando revisões novas..."):
+            novas = historico.sincronizar(max_paginas=PAGINAS_POR_SINCRONIZACAO,
+                                          progresso=lambda n, _: paginas.append(n))
+        st.sidebar.success(f"{novas} revisões novas.")
+        if len(paginas) >= PAGINAS_POR_SINCRONIZACAO:
+            st.sidebar.info("Ainda pode haver revisões pendentes: clique de novo para continuar.")
+
+    st.subheader("📉 Burndown")
+    burndown = historico.burndown(iteration_path, sprint["inicio"], sprint["fim"])
+    if burndown:
+        st.line_chart(pd.DataFrame(burndown).set_index("dia"))
+    else:
+        st.info("Sem revisões para esta sprint. Sincronize o histórico na barra lateral.")
+
+    tempos = historico.tempos_por_item(iteration_path)
+    st.subheader("⏳ Cycle time e tempo em Code Review por item")
+    st.dataframe(pd.DataFrame(tempos), use_container_width=True)
+
+    st.subheader("👨‍💻 Por desenvolvedor")
+    st.dataframe(pd.DataFrame(RevisionStore.tempos_por_dev(tempos)), use_container_width=True)
+
+except Exception as e:
+    st.error("Erro ao carregar o histórico da sprint.")
+    st.exception(e)
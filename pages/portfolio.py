@@ -0,0 +1,61 @@
+# Página de portfólio: sprint atual de todos os projetos/times configurados lado a lado
+import pandas as pd
+import streamlit as st
+
+from app import Dashboard, SprintAnalyzer
+from dados_sprint import carregar_portfolio
+
+st.set_page_config(layout="wide")
+st.title("🗂️ Portfólio de Times")
+
+try:
+    with st.spinner("Carregando a sprint atual de cada time..."):
+        resultados = carregar_portfolio()
+
+    linhas_times = []
+    linhas_devs = []
+    metricas_times = []
+    for resultado in resultados:
+        equipe, sprint = resultado["equipe"], resultado["sprint"]
+        if sprint is None:
+            st.warning(f"⚠️ {equipe['nome']}: {resultado['erro']}")
+            continue
+
+        metricas = SprintAnalyzer.calcular_metricas_gerais(
+            sprint["agregados"], sprint["inicio"], sprint["fim"], equipe.get("dev_count"), sprint.get("capacidade"))
+        metricas_times.append(metricas)
+        linhas_times.append({
+            "Time": equipe["nome"],
+            "Sprint": sprint["name"],
+            "Período": f"{sprint['inicio']:%d/%m} a {sprint['fim']:%d/%m}",
+            "Itens": metricas["total_items"],
+            "Concluídos": metricas["completed_items"],
+            "Conclusão (%)": round(metricas["completion_rate"], 1),
+            "Horas Estimadas": round(metricas["total_estimated"], 1),
+            "Horas Trabalhadas": round(metricas["total_worked"], 1),
+            "Eficiência (%)": round(metricas["efficiency"], 1)
+        })
+        for dev, dados in SprintAnalyzer.agrupar_por_dev(
+                sprint["agregados"], sprint["inicio"], sprint["fim"], sprint.get("capacidade")).items():
+            linhas_devs.append({
+                "Time": equipe["nome"],
+                "Dev": dev,
+                "Itens": dados["total_items"],
+                "Concluídos": dados["itens_concluidos"],
+                "Não planejadas": dados["nao_planejadas"],
+                "Horas Trabalhadas": round(dados["horas_trabalhadas"], 1),
+                "Performance (%)": round(dados["performance"], 1)
+            })
+
+    if metricas_times:
+        Dashboard.show_metrics(SprintAnalyzer.combinar_metricas(metricas_times))
+
+        st.markdown("## 👥 Por Time")
+        st.dataframe(pd.DataFrame(linhas_times), use_container_width=True, hide_index=True)
+
+        st.markdown("## 👨‍💻 Por Desenvolvedor")
+        st.dataframe(pd.DataFrame(linhas_devs), use_container_width=True, hide_index=True)
+
+except Exception as e:
+    st.error("Erro ao carregar o portfólio.")
+    st.exception(e)
@@ -0,0 +1,19 @@
+# Conversão de HTML para PDF (pdfkit + wkhtmltopdf), compartilhada pelas páginas e pelos relatórios em lote
+import os
+from functools import lru_cache
+
+# Instalação padrão no Windows; SPRINTREVIEW_WKHTMLTOPDF aponta outro binário e, sem o arquivo, vale o do PATH
+WKHTMLTOPDF = os.getenv("SPRINTREVIEW_WKHTMLTOPDF", "C:/Program Files/wkhtmltopdf/bin/wkhtmltopdf.exe")
+
+
+@lru_cache(maxsize=None)
+def _configuracao():
+    # Importado só aqui: quem não gera PDF não precisa do pdfkit nem do wkhtmltopdf
+    import pdfkit
+    return pdfkit.configuration(wkhtmltopdf=WKHTMLTOPDF if os.path.exists(WKHTMLTOPDF) else "")
+
+
+def html_para_pdf(html):
+    """Bytes do PDF gerado a partir do HTML"""
+    import pdfkit
+    return pdfkit.from_string(html, False, configuration=_configuracao())
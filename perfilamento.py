@@ -0,0 +1,93 @@
+# Perfilamento sob demanda de uma execução do dashboard (cProfile + tracemalloc)
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+import streamlit as st
+
+# tracemalloc e o cProfile valem para o processo todo: uma execução perfilada por vez
+_lock_perfil = threading.Lock()
+
+
+def perfil_solicitado():
+    """Ligado por ?perfil=1 na URL da sessão ou por SPRINTREVIEW_PROFILE=1 no servidor"""
+    return st.query_params.get("perfil") == "1" or os.getenv("SPRINTREVIEW_PROFILE") == "1"
+
+
+class Profiler:
+    """Mede cada etapa da execução (tempo e pico de memória) e guarda o cProfile completo
+
+    Só a thread do script é perfilada; chamadas feitas nos pools de threads da API
+    aparecem como a espera de quem as disparou.
+    """
+
+    def __init__(self):
+        self.ativo = False
+        self.etapas = []
+        self._profile = None
+
+    def iniciar(self):
+        if not _lock_perfil.acquire(blocking=False):
+            st.warning("⏱️ Outra sessão está sendo perfilada; esta execução segue sem perfil.")
+            return self
+        self.ativo = True
+        self._profile = cProfile.Profile()
+        tracemalloc.start()
+        self._profile.enable()
+        return self
+
+    def parar(self):
+        if not self.ativo:
+            return
+        self._profile.disable()
+        tracemalloc.stop()
+        _lock_perfil.release()
+
+    @contextmanager
+    def _medir(self, nome):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            _, pico = tracemalloc.get_traced_memory()
+            self.etapas.append({
+                "Etapa": nome,
+                "Tempo (ms)": round((time.perf_counter() - inicio) * 1000, 1),
+                "Pico de memória (MB)": round((pico - base) / 2**20, 2)
+            })
+
+    def etapa(self, nome):
+        return self._medir(nome) if self.ativo else nullcontext()
+
+    def pstats_bytes(self):
+        """Conteúdo de um arquivo .pstats (abre com pstats ou snakeviz)"""
+        self._profile.create_stats()
+        return marshal.dumps(self._profile.stats)
+
+    def funcoes_mais_lentas(self, limite=25):
+        saida = io.StringIO()
+        pstats.Stats(self._profile, stream=saida).sort_stats("cumulative").print_stats(limite)
+        return saida.getvalue()
+
+    def exibir(self, nome_arquivo="perfil"):
+        if not self.ativo:
+            return
+        self.parar()
+        with st.expander("⏱️ Perfil desta execução", expanded=True):
+            st.dataframe(pd.DataFrame(self.etapas), use_container_width=True, hide_index=True)
+            st.code(self.funcoes_mais_lentas(), language="text")
+            st.download_button(
+                label="📥 Baixar perfil (.pstats)",
+                data=self.pstats_bytes(),
+                file_name=f"{nome_arquivo}.pstats",
+                mime="application/octet-stream"
+            )
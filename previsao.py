@@ -0,0 +1,63 @@
+# Previsão de entrega por Monte Carlo sobre o throughput das sprints anteriores
+import numpy as np
+
+from agregados import ESTADOS_CONCLUIDOS
+
+SIMULACOES = 20000
+# Horizonte máximo da previsão do backlog (em sprints além da atual)
+MAX_SPRINTS = 26
+CONFIANCAS = (50, 85, 95)
+
+
+def _itens(agregados, tipos, devs):
+    if devs is None:
+        return (wi for itens in agregados.itens_por_dev.values() for wi in itens if wi.tipo in tipos)
+    return (wi for dev in devs for wi in agregados.itens_por_dev.get(dev, ()) if wi.tipo in tipos)
+
+
+def contar_concluidos(agregados, tipos, devs=None):
+    """Itens concluídos da sprint filtrados por tipo e dev (devs=None: todos)"""
+    if devs is None:
+        return sum(agregados.contar(tipo=tipo, estados=ESTADOS_CONCLUIDOS) for tipo in tipos)
+    return sum(wi.state.lower() in ESTADOS_CONCLUIDOS for wi in _itens(agregados, tipos, devs))
+
+
+def somar_concluidos(contagem, tipos, devs=None):
+    """Mesmo filtro de `contar_concluidos` sobre a contagem {(tipo, dev): itens} de uma sprint passada"""
+    return sum(n for (tipo, dev), n in contagem.items() if tipo in tipos and (devs is None or dev in devs))
+
+
+def contar_abertos(agregados, tipos, devs=None):
+    return sum(wi.state.lower() not in ESTADOS_CONCLUIDOS for wi in _itens(agregados, tipos, devs))
+
+
+def prever(historico, concluidos, abertos, fracao_restante, simulacoes=SIMULACOES, max_sprints=MAX_SPRINTS, rng=None):
+    """Simula a entrega a partir do throughput (itens concluídos) de cada sprint passada
+
+    Cada simulação é uma linha de uma matriz (simulações x sprints): a primeira coluna
+    é o que resta da sprint atual (Poisson sobre um throughput sorteado, proporcional
+    aos dias úteis que faltam) e as seguintes são sprints inteiras sorteadas do histórico.
+
+    Devolve, por nível de confiança, os itens concluídos ao fim da sprint ("pelo menos N")
+    e as sprints além da atual até zerar os abertos (None: não termina no horizonte).
+    """
+    historico = np.asarray(historico, dtype=float)
+    if not historico.size:
+        return None
+    rng = rng or np.random.default_rng()
+
+    amostras = rng.choice(historico, size=(simulacoes, max_sprints + 1))
+    amostras[:, 0] = rng.poisson(amostras[:, 0] * fracao_restante)
+    entregues = amostras.cumsum(axis=1)
+
+    ao_fim_da_sprint = concluidos + entregues[:, 0]
+    terminou = entregues >= abertos
+    # argmax acha a primeira sprint em que o backlog zera; quem não zera fica além do horizonte
+    sprints = np.where(terminou.any(axis=1), terminou.argmax(axis=1), max_sprints + 1)
+
+    percentis_sprints = np.percentile(sprints, CONFIANCAS, method="higher")
+    return {
+        "itens": {c: int(np.percentile(ao_fim_da_sprint, 100 - c, method="lower")) for c in CONFIANCAS},
+        "sprints": {c: (int(s) if s <= max_sprints else None) for c, s in zip(CONFIANCAS, percentis_sprints)},
+        "historico": historico
+    }
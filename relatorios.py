@@ -0,0 +1,181 @@
+# Geração em lote dos relatórios de várias sprints (e de cada dev) em processos paralelos
+import argparse
+import html
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from app import SprintAnalyzer, gerar_html_cards, gerar_html_relatorio
+from dados_sprint import baixar_iteracoes, carregar_sprint, derivar_user_stories
+from pdf import html_para_pdf
+
+MAX_TENTATIVAS = 3
+
+
+def _nome_arquivo(texto):
+    return re.sub(r"[^\w.-]+", "_", texto).strip("_")
+
+
+def gerar_relatorio_sprint(sprint, saida, pdf=False):
+    """Executado num processo de trabalho: grava o .zip da sprint e devolve a linha do índice"""
+    inicio, fim = sprint["inicio"], sprint["fim"]
+    agregados = sprint["agregados"]
+    metricas = SprintAnalyzer.calcular_metricas_gerais(agregados, inicio, fim, capacidade=sprint.get("capacidade"))
+    agrupados = SprintAnalyzer.agrupar_por_dev(agregados, inicio, fim, sprint.get("capacidade"))
+    user_stories = derivar_user_stories(sprint["work_items"])
+    periodo = f"{inicio.strftime('%d/%m/%Y')} a {fim.strftime('%d/%m/%Y')}"
+    nome = _nome_arquivo(sprint["path"])
+
+    arquivos = {
+        f"Relatorio_Sprint_{nome}.html": gerar_html_relatorio(
+            sprint["path"], inicio, fim, agrupados, user_stories, sprint["work_items"])
+    }
+    for dev, dados in agrupados.items():
+        arquivos[f"devs/{_nome_arquivo(dev)}.html"] = gerar_html_cards({dev: dados}, f"{sprint['name']} — {dev}", periodo)
+    if pdf:
+        for caminho, conteudo in list(arquivos.items()):
+            arquivos[caminho[:-len(".html")] + ".pdf"] = html_para_pdf(conteudo)
+
+    destino = os.path.join(saida, f"{nome}.zip")
+    with zipfile.ZipFile(f"{destino}.tmp", "w", compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for caminho, conteudo in arquivos.items():
+            arquivo_zip.writestr(caminho, conteudo)
+    os.replace(f"{destino}.tmp", destino)
+
+    return {
+        "path": sprint["path"],
+        "name": sprint["name"],
+        "periodo": periodo,
+        "arquivo": os.path.basename(destino),
+        "devs": len(agrupados),
+        **metricas
+    }
+
+
+def gerar_indice(saida, linhas, falhas):
+    """index.html com uma linha por sprint e o link para o .zip dos relatórios"""
+    corpo = "".join(
+        f"<tr><td>{html.escape(linha['name'])}</td><td>{linha['periodo']}</td>"
+        f"<td>{linha['total_items']}</td><td>{linha['completed_items']}</td>"
+        f"<td>{linha['completion_rate']:.1f}%</td><td>{linha['efficiency']:.1f}%</td><td>{linha['devs']}</td>"
+        f"<td><a href='{html.escape(linha['arquivo'])}'>{html.escape(linha['arquivo'])}</a></td></tr>"
+        for linha in linhas
+    )
+    corpo += "".join(
+        f"<tr><td>{html.escape(path)}</td><td colspan='7'>❌ {html.escape(erro)}</td></tr>"
+        for path, erro in falhas.items()
+    )
+    with open(os.path.join(saida, "index.html"), "w", encoding="utf-8") as arquivo:
+        arquivo.write(f"""
+        <html><head><meta charset='UTF-8'><title>Relatórios de Sprint</title>
+        <style>
+        body {{ font-family: Arial; }}
+        table {{ width: 100%; border-collapse: collapse; }}
+        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
+        th {{ background-color: #f2f2f2; }}
+        </style></head><body>
+        <h1>Relatórios de Sprint</h1>
+        <table>
+            <thead><tr>
+                <th>Sprint</th><th>Período</th><th>Itens</th><th>Concluídos</th>
+                <th>Conclusão</th><th>Eficiência</th><th>Devs</th><th>Relatórios</th>
+            </tr></thead>
+            <tbody>{corpo}</tbody>
+        </table></body></html>
+        """)
+
+
+def gerar_relatorios(paths, saida, processos=None, pdf=False, progresso=None):
+    """Baixa as sprints pelo cache compartilhado e renderiza cada uma num processo
+
+    A renderização de uma sprint começa assim que os dados dela chegam; sprints
+    que falham (na carga ou na renderização) são tentadas de novo sozinhas.
+    """
+    os.makedirs(saida, exist_ok=True)
+    linhas, falhas, tentativas = {}, {}, {}
+    fila = list(paths)
+
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        em_andamento = {}
+
+        def falhou(path, erro):
+            tentativas[path] = tentativas.get(path, 0) + 1
+            if tentativas[path] < MAX_TENTATIVAS:
+                fila.append(path)
+            else:
+                falhas[path] = str(erro)
+
+        while fila or em_andamento:
+            if fila:
+                path = fila.pop(0)
+                try:
+                    sprint = carregar_sprint(path)
+                except Exception as e:
+                    falhou(path, e)
+                    continue
+                em_andamento[executor.submit(gerar_relatorio_sprint, sprint, saida, pdf)] = path
+                # Enquanto houver sprints para baixar, só recolhe o que já terminou
+                concluidos, _ = wait(em_andamento, timeout=0)
+            else:
+                concluidos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+
+            for future in concluidos:
+                path = em_andamento.pop(future)
+                try:
+                    linhas[path] = future.result()
+                except Exception as e:
+                    falhou(path, e)
+                    continue
+                if progresso:
+                    progresso(path, len(linhas), len(paths))
+
+    ordenadas = [linhas[path] for path in paths if path in linhas]
+    gerar_indice(saida, ordenadas, falhas)
+    return ordenadas, falhas
+
+
+def _selecionar(iteracoes, de, ate):
+    """Iterações entre `de` e `ate` (nome ou path, inclusive), na ordem de início
+
+    Levanta ValueError se uma das sprints não existir.
+    """
+    def posicao(valor, padrao):
+        if valor is None:
+            return padrao
+        for i, it in enumerate(iteracoes):
+            if valor in (it["name"], it["path"]):
+                return i
+        raise ValueError(f"Sprint não encontrada: {valor}")
+    return iteracoes[posicao(de, 0):posicao(ate, len(iteracoes) - 1) + 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os relatórios HTML/PDF de um intervalo de sprints")
+    parser.add_argument("--de", help="Primeira sprint (nome ou path; padrão: a mais antiga)")
+    parser.add_argument("--ate", help="Última sprint (nome ou path; padrão: a sprint atual)")
+    parser.add_argument("--saida", default="relatorios", help="Diretório de saída")
+    parser.add_argument("--processos", type=int, help="Processos de renderização (padrão: nº de CPUs)")
+    parser.add_argument("--pdf", action="store_true", help="Gera também os PDFs (requer pdfkit/wkhtmltopdf)")
+    args = parser.parse_args()
+
+    iteracoes, current_path = baixar_iteracoes()
+    try:
+        selecionadas = _selecionar(iteracoes, args.de, args.ate or current_path)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Gerando relatórios de {len(selecionadas)} sprints...", flush=True)
+
+    inicio = time.monotonic()
+    linhas, falhas = gerar_relatorios(
+        [it["path"] for it in selecionadas], args.saida, args.processos, args.pdf,
+        progresso=lambda path, feitas, total: print(f"{feitas}/{total} {path}", flush=True)
+    )
+    print(f"✅ {len(linhas)} relatórios em {args.saida}/ ({time.monotonic() - inicio:.1f}s); índice em {args.saida}/index.html")
+    for path, erro in falhas.items():
+        print(f"❌ {path}: {erro}")
+
+
+if __name__ == "__main__":
+    main()
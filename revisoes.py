@@ -0,0 +1,274 @@
+# Histórico de revisões dos work items: ingestão incremental e métricas de fluxo
+import argparse
+import os
+import sqlite3
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from azure_devops import AZURE_CONFIG, AzureDevOpsAPI
+
+ESTADOS_CONCLUIDOS = ('done', 'concluído', 'finalizado')
+ESTADOS_INICIAIS = ('new', 'to do', 'novo', 'a fazer')
+ESTADO_CODE_REVIEW = 'Code Review'
+
+CAMPOS_REVISAO = [
+    "System.Id", "System.Rev", "System.ChangedDate", "System.WorkItemType", "System.State",
+    "System.AssignedTo", "System.IterationPath", "Microsoft.VSTS.Scheduling.RemainingWork"
+]
+
+# Strings repetidas (estado, dev, iteração, tipo) ficam uma vez só na tabela textos
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS textos (id INTEGER PRIMARY KEY, texto TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS itens (
+    id INTEGER PRIMARY KEY, rev INTEGER, tipo INTEGER, estado INTEGER,
+    dev INTEGER, iteracao INTEGER, restante REAL
+);
+CREATE TABLE IF NOT EXISTS transicoes (
+    id INTEGER, rev INTEGER, quando INTEGER, estado INTEGER,
+    dev INTEGER, iteracao INTEGER, restante REAL,
+    PRIMARY KEY (id, rev)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS transicoes_iteracao ON transicoes (iteracao, id);
+CREATE TABLE IF NOT EXISTS watermark (fonte TEXT PRIMARY KEY, token TEXT);
+"""
+
+
+def _epoch(data_iso):
+    return int(datetime.fromisoformat(data_iso.replace('Z', '+00:00')).timestamp())
+
+
+def _display_name(assigned_to):
+    if isinstance(assigned_to, dict):
+        return assigned_to.get('displayName', 'Não atribuído')
+    return assigned_to or 'Não atribuído'
+
+
+class RevisionStore:
+    """Transições de estado compactas em SQLite, alimentadas pela API de reporting"""
+
+    def __init__(self, caminho=None):
+        caminho = caminho or os.path.join(AZURE_CONFIG["DATA_DIR"], "revisoes.sqlite")
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        # Uma sincronização por vez; as leituras só esperam pela transação de cada página
+        self._sincronizando = threading.Lock()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        # Cache só da escrita; as leituras resolvem os textos no SQL e veem o que outro processo gravou
+        self._ids_texto = dict(self.conn.execute("SELECT texto, id FROM textos"))
+
+    def _texto_id(self, texto):
+        if texto is None:
+            return None
+        texto_id = self._ids_texto.get(texto)
+        if texto_id is None:
+            # Outro processo (o CLI de sincronização) pode já ter gravado o mesmo texto
+            self.conn.execute("INSERT OR IGNORE INTO textos (texto) VALUES (?)", (texto,))
+            texto_id = self.conn.execute("SELECT id FROM textos WHERE texto = ?", (texto,)).fetchone()[0]
+            self._ids_texto[texto] = texto_id
+        return texto_id
+
+    def watermark(self):
+        with self._lock:
+            row = self.conn.execute("SELECT token FROM watermark WHERE fonte = 'revisoes'").fetchone()
+        return row[0] if row else None
+
+    def sincronizar(self, api=None, max_paginas=None, progresso=None):
+        """Busca só as revisões posteriores à marca d'água e grava página a página
+
+        Cada página é aplicada na mesma transação que avança a marca d'água, então uma
+        carga interrompida recomeça exatamente da última página gravada. A trava das
+        leituras só é tomada durante essa transação, nunca enquanto a página é baixada.
+        """
+        api = api or AzureDevOpsAPI()
+        total = 0
+        with self._sincronizando:
+            paginas = api.iter_work_item_revisions(self.watermark(), CAMPOS_REVISAO)
+            for n, (revisoes, token, _) in enumerate(paginas, start=1):
+                with self._lock:
+                    try:
+                        with self.conn:
+                            self._aplicar(revisoes)
+                            self.conn.execute(
+                                "INSERT OR REPLACE INTO watermark (fonte, token) VALUES ('revisoes', ?)", (token,))
+                    except Exception:
+                        # Textos criados na transação desfeita não existem mais no banco
+                        self._ids_texto = dict(self.conn.execute("SELECT texto, id FROM textos"))
+                        raise
+                total += len(revisoes)
+                if progresso:
+                    progresso(n, total)
+                if max_paginas and n >= max_paginas:
+                    break
+        return total
+
+    def _aplicar(self, revisoes):
+        revisoes = sorted(revisoes, key=lambda r: (r['id'], r['rev']))
+        atuais = {}
+        ids = list({r['id'] for r in revisoes})
+        for i in range(0, len(ids), 500):
+            lote = ids[i:i + 500]
+            marcadores = ",".join("?" * len(lote))
+            for row in self.conn.execute(
+                    f"SELECT id, rev, estado, dev, iteracao, restante FROM itens WHERE id IN ({marcadores})", lote):
+                atuais[row[0]] = row[1:]
+
+        transicoes = []
+        for rev in revisoes:
+            fields = rev.get('fields', {})
+            anterior = atuais.get(rev['id'])
+            if anterior is not None and rev['rev'] <= anterior[0]:
+                continue  # revisão já aplicada numa execução anterior
+
+            estado = (
+                self._texto_id(fields.get('System.State')),
+                self._texto_id(_display_name(fields.get('System.AssignedTo'))),
+                self._texto_id(fields.get('System.IterationPath')),
+                fields.get('Microsoft.VSTS.Scheduling.RemainingWork')
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO itens (id, rev, tipo, estado, dev, iteracao, restante) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (rev['id'], rev['rev'], self._texto_id(fields.get('System.WorkItemType'))) + estado)
+            # Só mudanças relevantes viram transição; revisões de título, tags etc. são descartadas
+            if anterior is None or tuple(anterior[1:]) != estado:
+                transicoes.append((rev['id'], rev['rev'], _epoch(fields['System.ChangedDate'])) + estado)
+            atuais[rev['id']] = (rev['rev'],) + estado
+
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO transicoes (id, rev, quando, estado, dev, iteracao, restante) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            transicoes)
+
+    def _transicoes_da_iteracao(self, iteration_path):
+        """{id: [(quando, estado, dev, iteracao, restante), ...]} dos itens que passaram pela iteração"""
+        por_item = defaultdict(list)
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT t.id, t.quando, e.texto, d.texto, i.texto, t.restante FROM transicoes t
+                LEFT JOIN textos e ON e.id = t.estado
+                LEFT JOIN textos d ON d.id = t.dev
+                LEFT JOIN textos i ON i.id = t.iteracao
+                WHERE t.id IN (
+                    SELECT DISTINCT id FROM transicoes
+                    WHERE iteracao = (SELECT id FROM textos WHERE texto = ?)
+                )
+                ORDER BY t.id, t.rev
+                """, (iteration_path,)).fetchall()
+        for row in rows:
+            por_item[row[0]].append(row[1:])
+        return por_item
+
+    def estados_na_iteracao(self, iteration_path):
+        """{id: (dev, estado)} da última revisão de cada item enquanto ele estava na iteração
+
+        Vale também para os itens que já saíram dela (levados para outra sprint).
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT t.id, d.texto, e.texto FROM transicoes t
+                JOIN (
+                    SELECT id, MAX(rev) AS rev FROM transicoes
+                    WHERE iteracao = (SELECT id FROM textos WHERE texto = ?)
+                    GROUP BY id
+                ) ultima ON ultima.id = t.id AND ultima.rev = t.rev
+                LEFT JOIN textos d ON d.id = t.dev
+                LEFT JOIN textos e ON e.id = t.estado
+                """, (iteration_path,))
+            return {row[0]: (row[1], row[2]) for row in rows}
+
+    def burndown(self, iteration_path, inicio, fim):
+        """Itens abertos e horas restantes da sprint ao fim de cada dia (UTC)"""
+        por_item = self._transicoes_da_iteracao(iteration_path)
+        agora = datetime.now(timezone.utc)
+        dias = []
+        dia = inicio.date()
+        while dia <= fim.date() and datetime(dia.year, dia.month, dia.day, tzinfo=timezone.utc) <= agora:
+            dias.append(dia)
+            dia += timedelta(days=1)
+
+        cortes = [int(datetime(d.year, d.month, d.day, 23, 59, 59, tzinfo=timezone.utc).timestamp()) for d in dias]
+        abertos = [0] * len(dias)
+        restantes = [0.0] * len(dias)
+        for transicoes in por_item.values():
+            momentos = [t[0] for t in transicoes]
+            for i, corte in enumerate(cortes):
+                pos = bisect_right(momentos, corte)
+                if not pos:
+                    continue
+                _, estado, _, iteracao, restante = transicoes[pos - 1]
+                if iteracao == iteration_path and (estado or '').lower() not in ESTADOS_CONCLUIDOS:
+                    abertos[i] += 1
+                    restantes[i] += restante or 0
+
+        return [
+            {"dia": d, "itens_abertos": a, "horas_restantes": round(r, 1)}
+            for d, a, r in zip(dias, abertos, restantes)
+        ]
+
+    def tempos_por_item(self, iteration_path):
+        """Cycle time (dias) e tempo em Code Review (horas) de cada item da iteração"""
+        agora = int(datetime.now(timezone.utc).timestamp())
+        resultado = []
+        for item_id, transicoes in self._transicoes_da_iteracao(iteration_path).items():
+            inicio = fim = None
+            segundos_code_review = 0
+            for i, (quando, estado, _, _, _) in enumerate(transicoes):
+                estado_lower = (estado or '').lower()
+                if inicio is None and estado_lower not in ESTADOS_INICIAIS:
+                    inicio = quando
+                if fim is None and estado_lower in ESTADOS_CONCLUIDOS:
+                    fim = quando
+                if estado == ESTADO_CODE_REVIEW:
+                    saida = transicoes[i + 1][0] if i + 1 < len(transicoes) else agora
+                    segundos_code_review += saida - quando
+
+            resultado.append({
+                "id": item_id,
+                "dev": transicoes[-1][2],
+                "estado": transicoes[-1][1],
+                "cycle_time_dias": round((fim - inicio) / 86400, 1) if inicio is not None and fim is not None else None,
+                "horas_code_review": round(segundos_code_review / 3600, 1)
+            })
+        return resultado
+
+    @staticmethod
+    def tempos_por_dev(tempos_itens):
+        """Média de cycle time e total de horas em Code Review por dev"""
+        por_dev = defaultdict(lambda: {"itens": 0, "cycle_times": [], "horas_code_review": 0.0})
+        for item in tempos_itens:
+            dados = por_dev[item["dev"]]
+            dados["itens"] += 1
+            dados["horas_code_review"] += item["horas_code_review"]
+            if item["cycle_time_dias"] is not None:
+                dados["cycle_times"].append(item["cycle_time_dias"])
+
+        return [
+            {
+                "dev": dev,
+                "itens": dados["itens"],
+                "cycle_time_medio_dias": round(sum(dados["cycle_times"]) / len(dados["cycle_times"]), 1) if dados["cycle_times"] else None,
+                "horas_code_review": round(dados["horas_code_review"], 1)
+            }
+            for dev, dados in por_dev.items()
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincroniza o histórico de revisões dos work items")
+    parser.add_argument("--db", help="Caminho do banco SQLite (padrão: DATA_DIR/revisoes.sqlite)")
+    parser.add_argument("--max-paginas", type=int, help="Interrompe após N páginas (a carga continua na próxima execução)")
+    args = parser.parse_args()
+
+    store = RevisionStore(args.db)
+    total = store.sincronizar(
+        max_paginas=args.max_paginas,
+        progresso=lambda paginas, revisoes: print(f"{paginas} páginas, {revisoes} revisões", flush=True)
+    )
+    print(f"✅ {total} revisões novas sincronizadas.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Tabelas paginadas no servidor: cada rerun envia ao navegador só as linhas da página visível
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+TAMANHO_PAGINA = 50
+
+
+class TabelaIndexada:
+    """DataFrame somente leitura com texto de busca e ordenações pré-calculadas
+
+    Filtrar é uma máscara vetorizada sobre a coluna de busca; cada ordenação é
+    calculada uma vez e reaproveitada por todas as sessões que leem a tabela.
+    """
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self._busca = self.df.astype(str).agg(" ".join, axis=1).str.lower() if len(self.df) else pd.Series(dtype=str)
+        self._ordens = {}
+
+    @classmethod
+    def de_linhas(cls, linhas, colunas):
+        return cls(pd.DataFrame(linhas, columns=colunas))
+
+    def __len__(self):
+        return len(self.df)
+
+    def tamanho_bytes(self):
+        """Memória do DataFrame, da coluna de busca e das ordenações já calculadas"""
+        return int(self.df.memory_usage(deep=True).sum() + self._busca.memory_usage(deep=True)
+                   + sum(ordem.nbytes for ordem in self._ordens.values()))
+
+    def soma(self, coluna):
+        return float(self.df[coluna].sum()) if len(self.df) else 0.0
+
+    def _ordem(self, coluna, decrescente):
+        chave = (coluna, decrescente)
+        if chave not in self._ordens:
+            # Corrida inofensiva entre sessões: as duas calculam a mesma ordem
+            self._ordens[chave] = self.df.sort_values(
+                coluna, ascending=not decrescente, kind="stable", na_position="last").index.to_numpy()
+        return self._ordens[chave]
+
+    def posicoes(self, texto="", coluna=None, decrescente=False):
+        """Posições das linhas que contêm `texto`, na ordem pedida"""
+        ordem = self._ordem(coluna, decrescente) if coluna else np.arange(len(self.df))
+        if texto:
+            mascara = self._busca.str.contains(texto.lower(), regex=False).to_numpy()
+            ordem = ordem[mascara[ordem]]
+        return ordem
+
+
+@st.fragment
+def tabela_paginada(chave, tabela, tamanho_pagina=TAMANHO_PAGINA):
+    """Filtro, ordenação e paginação no servidor; mexer nos controles só reexecuta esta tabela"""
+    col_filtro, col_ordem, col_sentido = st.columns([3, 2, 1])
+    texto = col_filtro.text_input("🔎 Filtrar", key=f"{chave}_filtro")
+    coluna = col_ordem.selectbox("Ordenar por", [None, *tabela.df.columns], key=f"{chave}_ordem",
+                                 format_func=lambda c: "Ordem original" if c is None else c)
+    decrescente = col_sentido.toggle("Decrescente", key=f"{chave}_decrescente")
+
+    posicoes = tabela.posicoes(texto, coluna, decrescente)
+    total_paginas = max(-(-len(posicoes) // tamanho_pagina), 1)
+    chave_pagina = f"{chave}_pagina"
+    # Um filtro novo pode encolher a tabela abaixo da página em que o usuário estava
+    if st.session_state.get(chave_pagina, 1) > total_paginas:
+        st.session_state[chave_pagina] = total_paginas
+    pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, key=chave_pagina)
+
+    inicio = (pagina - 1) * tamanho_pagina
+    visiveis = posicoes[inicio:inicio + tamanho_pagina]
+    st.dataframe(tabela.df.iloc[visiveis], use_container_width=True, hide_index=True)
+    if len(posicoes):
+        st.caption(f"Linhas {inicio + 1}–{inicio + len(visiveis)} de {len(posicoes)}"
+                   + (f" (filtradas de {len(tabela)})" if len(posicoes) != len(tabela) else ""))
@@ -0,0 +1,171 @@
+# Receptor de service hooks do Azure DevOps (workitem.created/updated/deleted) e emissor de eventos falsos
+import argparse
+import base64
+import hmac
+import ipaddress
+import json
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from azure_devops import AZURE_CONFIG
+from work_item import WorkItem
+
+EVENTOS = ("workitem.created", "workitem.updated", "workitem.deleted")
+TIPOS_SPRINT = ("User Story", "Task", "Bug")
+
+
+def _campos_com_identidade(fields):
+    # Payloads antigos trazem AssignedTo como "Nome <email>"; o WorkItem espera o identityRef
+    assigned_to = fields.get("System.AssignedTo")
+    if isinstance(assigned_to, str):
+        fields = {**fields, "System.AssignedTo": {"displayName": assigned_to.split(" <")[0]}}
+    return fields
+
+
+def interpretar_evento(evento):
+    """(id, WorkItem ou None, iteração, iteração anterior) de um evento de service hook
+
+    Devolve None para eventos ignorados (outros tipos de evento ou de work item).
+    """
+    tipo_evento = evento.get("eventType")
+    if tipo_evento not in EVENTOS:
+        return None
+    resource = evento.get("resource", {})
+
+    if tipo_evento == "workitem.updated":
+        # resource.fields só tem as mudanças; resource.revision traz o item inteiro
+        item_id = resource.get("workItemId")
+        fields = resource.get("revision", {}).get("fields", {})
+        mudanca_iteracao = resource.get("fields", {}).get("System.IterationPath", {})
+        iteracao_anterior = mudanca_iteracao.get("oldValue")
+    else:
+        item_id = resource.get("id")
+        fields = resource.get("fields", {})
+        iteracao_anterior = None
+
+    if item_id is None or fields.get("System.WorkItemType") not in TIPOS_SPRINT:
+        return None
+    iteracao = fields.get("System.IterationPath")
+    if tipo_evento == "workitem.deleted":
+        return item_id, None, None, iteracao
+    return item_id, WorkItem.from_json({"id": item_id, "fields": _campos_com_identidade(fields)}), iteracao, iteracao_anterior
+
+
+class _Handler(BaseHTTPRequestHandler):
+    aplicar = None
+    segredo = None
+
+    def _autorizado(self):
+        if not self.segredo:
+            return True
+        # O service hook envia o segredo como senha de autenticação básica
+        esperado = "Basic " + base64.b64encode(f":{self.segredo}".encode()).decode()
+        return hmac.compare_digest(self.headers.get("Authorization", ""), esperado)
+
+    def _responder(self, status, corpo):
+        conteudo = json.dumps(corpo).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def do_POST(self):
+        if not self._autorizado():
+            return self._responder(401, {"erro": "não autorizado"})
+        try:
+            evento = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            return self._responder(400, {"erro": "JSON inválido"})
+        if not isinstance(evento, dict):
+            return self._responder(400, {"erro": "o evento deve ser um objeto JSON"})
+
+        try:
+            mudanca = interpretar_evento(evento)
+        except (AttributeError, TypeError, KeyError, ValueError):
+            # Objeto com a estrutura errada (resource ou fields que não são objetos etc.)
+            return self._responder(400, {"erro": "evento malformado"})
+        try:
+            alteradas = self.aplicar(*mudanca) if mudanca else []
+        except Exception as e:
+            # Sem resposta o Azure DevOps só veria a conexão cair; com 500 ele reenvia o evento
+            return self._responder(500, {"erro": str(e)})
+        self._responder(200, {"sprints_alteradas": alteradas})
+
+    def log_message(self, *args):
+        pass
+
+
+def _loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def iniciar_receptor(aplicar, porta, host="127.0.0.1", segredo=None):
+    """Sobe o receptor numa thread daemon; `aplicar(id, novo, iteracao, iteracao_anterior)` recebe cada mudança
+
+    Fora da interface local o segredo é obrigatório: sem ele qualquer um na rede injetaria itens.
+    """
+    if not segredo and not _loopback(host):
+        raise ValueError(f"O receptor de webhooks em {host} exige SPRINTREVIEW_WEBHOOK_SECRET")
+    handler = type("Handler", (_Handler,), {"aplicar": staticmethod(aplicar), "segredo": segredo})
+    servidor = ThreadingHTTPServer((host, porta), handler)
+    threading.Thread(target=servidor.serve_forever, name="webhook", daemon=True).start()
+    return servidor
+
+
+def evento_falso(tipo_evento, item_id, fields, campos_alterados=None):
+    """Monta um payload no formato do service hook, para testes locais"""
+    if tipo_evento == "workitem.updated":
+        resource = {
+            "workItemId": item_id,
+            "fields": campos_alterados or {},
+            "revision": {"id": item_id, "fields": fields}
+        }
+    else:
+        resource = {"id": item_id, "fields": fields}
+    return {"eventType": tipo_evento, "resource": resource}
+
+
+def enviar_evento(url, evento, segredo=None):
+    requisicao = urllib.request.Request(url, data=json.dumps(evento).encode(), method="POST",
+                                        headers={"Content-Type": "application/json"})
+    if segredo:
+        requisicao.add_header("Authorization", "Basic " + base64.b64encode(f":{segredo}".encode()).decode())
+    with urllib.request.urlopen(requisicao, timeout=10) as resposta:
+        return json.load(resposta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Envia um evento de work item falso para o receptor de webhooks")
+    parser.add_argument("id", type=int, help="ID do work item")
+    parser.add_argument("iteracao", help="Iteration path do item")
+    parser.add_argument("--evento", choices=EVENTOS, default="workitem.updated")
+    parser.add_argument("--url", default=f"http://localhost:{AZURE_CONFIG['WEBHOOK_PORT'] or 8765}/")
+    parser.add_argument("--titulo", default="Item de teste")
+    parser.add_argument("--tipo", default="Task")
+    parser.add_argument("--estado", default="Done")
+    parser.add_argument("--dev", default="Não atribuído")
+    parser.add_argument("--horas", type=float, default=0)
+    parser.add_argument("--iteracao-anterior", help="Simula a mudança de sprint do item")
+    args = parser.parse_args()
+
+    fields = {
+        "System.Title": args.titulo, "System.WorkItemType": args.tipo, "System.State": args.estado,
+        "System.AssignedTo": {"displayName": args.dev}, "System.IterationPath": args.iteracao,
+        "Microsoft.VSTS.Scheduling.CompletedWork": args.horas
+    }
+    alterados = {}
+    if args.iteracao_anterior:
+        alterados["System.IterationPath"] = {"oldValue": args.iteracao_anterior, "newValue": args.iteracao}
+    resposta = enviar_evento(args.url, evento_falso(args.evento, args.id, fields, alterados), AZURE_CONFIG["WEBHOOK_SECRET"])
+    print(f"✅ Sprints alteradas: {', '.join(resposta['sprints_alteradas']) or 'nenhuma'}")
+
+
+if __name__ == "__main__":
+    main()
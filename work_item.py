@@ -0,0 +1,50 @@
+# Modelo compacto de work item usado em todo o dashboard
+import sys
+
+
+class WorkItem:
+    """Só os campos que o dashboard usa, sem o dict aninhado do JSON da API
+
+    Estado, tipo e dev se repetem em quase todos os itens, então são internados.
+    """
+    __slots__ = ("id", "title", "tipo", "state", "dev", "parent", "original_estimate", "completed_work", "tags")
+
+    def __init__(self, id, title="", tipo="", state="", dev="Não atribuído", parent=None,
+                 original_estimate=0, completed_work=0, tags=""):
+        self.id = id
+        self.title = title
+        self.tipo = sys.intern(tipo)
+        self.state = sys.intern(state)
+        self.dev = sys.intern(dev)
+        self.parent = parent
+        self.original_estimate = original_estimate
+        self.completed_work = completed_work
+        self.tags = tags
+
+    @classmethod
+    def from_json(cls, item):
+        fields = item.get('fields', {})
+        return cls(
+            id=item['id'],
+            title=fields.get('System.Title', ''),
+            tipo=fields.get('System.WorkItemType', ''),
+            state=fields.get('System.State', ''),
+            dev=fields.get('System.AssignedTo', {}).get('displayName', 'Não atribuído'),
+            parent=fields.get('System.Parent'),
+            original_estimate=fields.get('Microsoft.VSTS.Scheduling.OriginalEstimate') or 0,
+            completed_work=fields.get('Microsoft.VSTS.Scheduling.CompletedWork') or 0,
+            tags=fields.get('System.Tags', '')
+        )
+
+    def __getstate__(self):
+        return tuple(getattr(self, campo) for campo in self.__slots__)
+
+    def __setstate__(self, state):
+        # Reinterna as strings ao sair do pickle (cache do Streamlit, processos de trabalho)
+        self.__init__(*state)
+
+    def as_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    def __repr__(self):
+        return f"WorkItem(id={self.id}, tipo={self.tipo!r}, state={self.state!r}, dev={self.dev!r})"